@@ -1,5 +1,15 @@
 #!/bin/bash
 
+# Production mode: the build steps (collectstatic, makemigrations, tests) are done when building
+# the release, only the pending migrations are applied before serving with preforked workers.
+if [ "$SERVER_MODE" = "production" ]; then
+    echo "Apply database migrations"
+    python manage.py migrate --noinput
+
+    echo "Starting production server"
+    exec gunicorn --config gunicorn.conf.py portfoling.wsgi
+fi
+
 # Collect static files
 echo "Collect static files"
 python manage.py collectstatic --noinput
@@ -11,7 +21,7 @@ python manage.py migrate
 
 #Testing
 echo "Testing"
-python manage.py test
+python manage.py test --exclude-tag performance
 
 # Start server
 echo "Starting server"
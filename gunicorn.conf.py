@@ -0,0 +1,38 @@
+"""
+Gunicorn settings of the production mode, see `docker-entrypoint.sh`.
+
+The application is loaded and warmed up once in the master process, the workers are
+forked from it ready to serve. The time from the boot to the ready server and to the
+first response of each worker is logged.
+"""
+import os
+import time
+import multiprocessing
+
+
+BOOT_TIME = time.time()
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+#Processes serving the requests.
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+#Threads of each worker, more than one switches the workers to the threaded class.
+threads = int(os.environ.get('WORKER_THREADS', 1))
+timeout = int(os.environ.get('WORKER_TIMEOUT', 30))
+preload_app = True
+accesslog = '-'
+
+def when_ready(server):
+    from django.db import connections
+    from portfolio.db.pool import close_pools
+    from portfolio.warmup import warm_up
+
+    duration = warm_up()
+    #The workers open their own connections, the pooled ones are really closed before the fork.
+    connections.close_all()
+    close_pools()
+    server.log.info('Warmed up in %.0f ms, ready %.2f s after boot', duration * 1000, time.time() - BOOT_TIME)
+
+def post_request(worker, req, environ, resp):
+    if not getattr(worker, 'first_response_logged', False):
+        worker.first_response_logged = True
+        worker.log.info('Worker %s sent its first response %.2f s after boot', worker.pid, time.time() - BOOT_TIME)
@@ -46,11 +46,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'django_cleanup',
+    'django.contrib.postgres',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'portfolio.staticfiles.StaticFilesMiddleware',
+    'portfolio.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -98,12 +100,23 @@ WSGI_APPLICATION = 'portfoling.wsgi.application'
 #Setting PostgreSQL database
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'portfolio.db',
         'NAME': 'portfolling_database',
         'USER': 'portfolling',
         'PASSWORD': 'portfollingpassword',
         'HOST': 'postgres',
-        'PORT': '5432' 
+        'PORT': '5432',
+        #Connections kept open by each process, see `portfolio.db.pool`. The size should cover the
+        #threads of a process using the database: server threads, async views, background tasks.
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DB_POOL_SIZE', default=10)),
+            #Seconds an unused connection stays open.
+            'MAX_IDLE': int(os.environ.get('DB_POOL_MAX_IDLE', default=5 * 60)),
+            #Seconds unused after which a connection is checked before being reused.
+            'CHECK_AFTER': int(os.environ.get('DB_POOL_CHECK_AFTER', default=30)),
+            #Seconds waited for a connection when they are all in use.
+            'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', default=10)),
+        },
     }
 }
 
@@ -126,6 +139,23 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+#The first hasher hashes the new passwords, the passwords hashed by the others are rehashed with
+#it on the next login.
+PASSWORD_HASHERS = [
+    'portfolio.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+#PBKDF2 iterations of the password hashes, changing it rehashes the passwords on login.
+PASSWORD_ITERATIONS = int(os.environ.get('PASSWORD_ITERATIONS', default=216000))
+
+#Failed logins allowed for a username from a client IP, and for a client IP, in `LOGIN_ATTEMPTS_WINDOW`
+#seconds, see `portfolio.throttling`. The next ones are refused before the password is hashed.
+LOGIN_ATTEMPTS_LIMIT = int(os.environ.get('LOGIN_ATTEMPTS_LIMIT', default=5))
+LOGIN_IP_ATTEMPTS_LIMIT = int(os.environ.get('LOGIN_IP_ATTEMPTS_LIMIT', default=20))
+LOGIN_ATTEMPTS_WINDOW = int(os.environ.get('LOGIN_ATTEMPTS_WINDOW', default=15 * 60))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.1/topics/i18n/
@@ -150,14 +180,103 @@ PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 STATIC_ROOT = os.path.join(PROJECT_DIR, 'static')
 STATIC_URL = '/static/'
+#Collected with hashed names and compressed copies, served by `portfolio.staticfiles.StaticFilesMiddleware`.
+STATICFILES_STORAGE = 'portfolio.staticfiles.CompressedManifestStaticFilesStorage'
 
 MEDIA_ROOT = os.path.join(PROJECT_DIR, 'media')
 MEDIA_URL = '/media/'
+#Uploads are stored once per content and deleted when unreferenced by `gc_media`, see `portfolio.blobs`.
+DEFAULT_FILE_STORAGE = 'portfolio.storage.ContentAddressedStorage'
+#Set to `x-accel-redirect` (nginx) or `x-sendfile` (Apache, lighttpd) to let the web server send the
+#uploaded files after the application checked the request, see `portfolio.media`.
+MEDIA_OFFLOAD = os.environ.get('MEDIA_OFFLOAD', default='')
+#Internal location of the web server serving `MEDIA_ROOT`, used with X-Accel-Redirect.
+MEDIA_OFFLOAD_PREFIX = os.environ.get('MEDIA_OFFLOAD_PREFIX', default='/protected-media/')
+
+#Uploads bigger than this, in bytes, are rejected before being read, see `portfolio.uploadhandlers`.
+MAX_UPLOAD_REQUEST_SIZE = int(os.environ.get('MAX_UPLOAD_REQUEST_SIZE', default=150 * 1024 * 1024))
+
+#Maximum number of items of the API bulk requests.
+BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', default=1000))
+
+
+#Cache
+
+#Redis server shared by the processes of every server, so an invalidation or a counter is seen by all of
+#them, and the counters are incremented atomically.
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', default='redis://redis:6379/0'),
+    },
+}
+
+#Seconds a profile or project page stays cached, it's also invalidated on change, see `portfolio.pagecache`.
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', default=60 * 60))
+#Fraction of the pages requests counted in the hit ratio statistics.
+PAGE_CACHE_STATS_RATE = float(os.environ.get('PAGE_CACHE_STATS_RATE', default=0.01))
+#Seconds the ids of the API lists pages, by filters and ordering, stay cached, see `portfolio.resultcache`.
+RESULTS_CACHE_TIMEOUT = int(os.environ.get('RESULTS_CACHE_TIMEOUT', default=30))
+
+#Sessions are read from the cache, and from the database when they aren't cached.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
+#Async views
+
+#Serve the pages and API reads as coroutines, for ASGI servers, see `portfolio.asyncviews`.
+ASYNC_VIEWS = bool(int(os.environ.get('ASYNC_VIEWS', default=0)))
+#Threads of each process running the database work of the async views.
+ASYNC_WORKERS = int(os.environ.get('ASYNC_WORKERS', default=8))
+
+
+#Background tasks
+
+#Threads of each process running tasks off the request path, like the images variants generation.
+BACKGROUND_WORKERS = int(os.environ.get('BACKGROUND_WORKERS', default=2))
+#Also run the queued tasks in the process queuing them, without waiting for the `run_tasks` workers.
+BACKGROUND_IN_PROCESS = bool(int(os.environ.get('BACKGROUND_IN_PROCESS', default=1)))
+#Attempts of a failing task, the retries wait TASK_RETRY_DELAY seconds, doubled at each attempt.
+TASK_MAX_ATTEMPTS = int(os.environ.get('TASK_MAX_ATTEMPTS', default=5))
+TASK_RETRY_DELAY = int(os.environ.get('TASK_RETRY_DELAY', default=30))
+#Seconds a running task is hidden from the other workers, it's run again after if its worker died.
+TASK_LEASE = int(os.environ.get('TASK_LEASE', default=10 * 60))
+#Seconds the workers wait before looking for due tasks again when the queue is empty.
+TASK_POLL_INTERVAL = float(os.environ.get('TASK_POLL_INTERVAL', default=1))
+
+#Threads of each process checking and storing the files of a batch upload, see `portfolio.batch`.
+UPLOAD_WORKERS = int(os.environ.get('UPLOAD_WORKERS', default=4))
+
+#Rows removed by transaction when purging the deleted projects and portfollers, see `portfolio.purge`.
+PURGE_BATCH_SIZE = int(os.environ.get('PURGE_BATCH_SIZE', default=500))
+#Threads of the purge deleting the files no longer referenced.
+PURGE_WORKERS = int(os.environ.get('PURGE_WORKERS', default=4))
+#Seconds since their last upload before the files released by a purge are deleted, younger ones are left to `gc_media`.
+PURGE_MEDIA_GRACE = int(os.environ.get('PURGE_MEDIA_GRACE', default=10 * 60))
 
 
 #Django REST Framework settings
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 15
-}
\ No newline at end of file
+    'DEFAULT_PAGINATION_CLASS': 'portfolio.pagination.KeysetPagination',
+    'PAGE_SIZE': 15,
+    #Encoding with orjson when installed, see `portfolio.renderers`.
+    'DEFAULT_RENDERER_CLASSES': [
+        'portfolio.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'portfolio.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+
+#Responses compression, see `portfolio.compression`
+
+#Content types compressed, and the size from which they are, in bytes.
+COMPRESS_CONTENT_TYPES = ['application/json']
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', default=1024))
+COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', default=6))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', default=4))
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PortfolioConfig(AppConfig):
     name = 'portfolio'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,68 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+_executor = None
+
+def get_executor():
+    """
+    Returns the thread pool running the database and template work of the async views,
+    it bounds the requests of a process using a database connection at the same time.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.ASYNC_WORKERS, thread_name_prefix='portfolio-async')
+    return _executor
+
+def _run(func, args, kwargs):
+    #The request signals closing the connections run in another thread, so it's done here.
+    close_old_connections()
+    try:
+        response = func(*args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+async def run_in_pool(func, *args, **kwargs):
+    """
+    Runs `func(*args, **kwargs)` in the async views thread pool and renders the returned
+    response there, without blocking the event loop.
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_event_loop().run_in_executor(get_executor(), partial(context.run, _run, func, args, kwargs))
+
+def async_read_view(view):
+    """
+    Returns a coroutine view answering the GET and HEAD requests with `view` run through
+    `run_in_pool`. Other requests run like a sync view.
+    """
+    write_view = sync_to_async(view, thread_sensitive=True)
+
+    @wraps(view)
+    async def wrapped_view(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await run_in_pool(view, request, *args, **kwargs)
+        return await write_view(request, *args, **kwargs)
+    return wrapped_view
+
+class AsyncReadMixin:
+    """
+    View or viewset mixin serving its reads asynchronously with `async_read_view`, when
+    `settings.ASYNC_VIEWS` is set. Under ASGI, a process then keeps serving other
+    connections while the reads wait for the database or for slow clients.
+    """
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        view = super().as_view(*args, **initkwargs)
+        if not settings.ASYNC_VIEWS:
+            return view
+        return async_read_view(view)
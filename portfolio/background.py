@@ -0,0 +1,49 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .tasks import enqueue_many, run_pending
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.BACKGROUND_WORKERS, thread_name_prefix='portfolio')
+    return _executor
+
+def _run(pk):
+    try:
+        run_pending(pk)
+    except Exception:
+        logger.exception('Background task %s failed', pk)
+    finally:
+        connections.close_all()
+
+def run_in_background(func, *args):
+    """
+    Runs `func(*args)` off the request path, see `run_many_in_background`.
+    """
+    run_many_in_background(func, [args])
+
+def run_many_in_background(func, args_list):
+    """
+    Queues a task calling `func` for each arguments tuple of `args_list`, in the current
+    transaction, see `portfolio.tasks`. They're run by the `run_tasks` workers, and with
+    `settings.BACKGROUND_IN_PROCESS` also by this process worker pool once the transaction
+    is committed, so the request doesn't wait for them and they see the committed data.
+    """
+    tasks = enqueue_many(func, args_list)
+
+    def submit():
+        for task in tasks:
+            #A task already claimed by a worker is skipped.
+            get_executor().submit(_run, task.pk)
+
+    if settings.BACKGROUND_IN_PROCESS:
+        transaction.on_commit(submit)
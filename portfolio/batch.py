@@ -0,0 +1,82 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Project, ProjectImages
+from .validators import validate_file_size
+from .background import run_many_in_background
+from .conditional import touch
+from .images import update_variants
+from .pagecache import projects_changed
+from .blobs import adjust_references
+
+
+_executor = None
+
+def get_executor():
+    """
+    Returns the thread pool checking and storing the files of a batch upload during the request.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.UPLOAD_WORKERS, thread_name_prefix='portfolio-upload')
+    return _executor
+
+def validate_image(file):
+    """
+    Returns the error messages of the uploaded `file` as a project image, empty if it's valid.
+    """
+    try:
+        forms.ImageField(validators=[validate_file_size]).clean(file)
+    except ValidationError as e:
+        return e.messages
+    return []
+
+def validate_images(files):
+    """
+    Checks the uploaded `files` concurrently, returns the list of error messages of each one.
+    """
+    return list(get_executor().map(validate_image, files))
+
+def store_image(image):
+    image.image.save(image.image.name, image.image.file, save=False)
+
+def create_project_images(project, images):
+    """
+    Adds the new `images` to `project`: their files are written to the storage in parallel
+    and the rows are inserted with one query. Returns the saved images.
+
+    `bulk_create` doesn't send signals, so what their receivers do for a single image
+    is done here once for all of them.
+    """
+    if not images:
+        return []
+    for image in images:
+        image.project = project
+    #Files left by a failed insert are deleted by `gc_media --scan`, they may be shared.
+    list(get_executor().map(store_image, images))
+    with transaction.atomic():
+        images = ProjectImages.objects.bulk_create(images)
+        adjust_references(Counter(image.image.name for image in images))
+    for image in images:
+        image._loaded_values = {'image': image.image.name}
+    run_many_in_background(update_variants, [('portfolio.ProjectImages', image.pk, 'image') for image in images])
+    touch(Project, project.pk)
+    projects_changed(project.user.username, [project.project_name])
+    return images
+
+def save_project_images_formset(formset):
+    """
+    Saves a `ProjectImagesFormSet`, the added images are created with `create_project_images`.
+    """
+    instances = formset.save(commit=False)
+    for image in formset.deleted_objects:
+        image.delete()
+    for image in instances:
+        if image.pk is not None:
+            image.save()
+    create_project_images(formset.instance, [image for image in instances if image.pk is None])
@@ -0,0 +1,150 @@
+import os
+import datetime
+from itertools import islice
+from functools import partial
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Portfoller, ProjectImages, Blob
+from .images import VARIANTS_DIRECTORY, get_variant_names
+
+
+#Models and fields whose files are counted, their default file is never collected.
+REFERENCING_FIELDS = ((Portfoller, 'profile_picture'), (ProjectImages, 'image'))
+
+def get_uncounted_names():
+    return {model._meta.get_field(field_name).default for model, field_name in REFERENCING_FIELDS}
+
+def adjust_references(deltas):
+    """
+    Adds the `{name: delta}` `deltas` to the reference counts of the stored files.
+    """
+    uncounted = get_uncounted_names()
+    #Sorted, so concurrent transactions lock the rows in the same order.
+    deltas = sorted((name, delta) for name, delta in deltas.items() if name and delta and name not in uncounted)
+    if not deltas:
+        return
+    now = timezone.now()
+    table = connection.ops.quote_name(Blob._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO %s (name, refcount, updated_at) VALUES %s '
+            'ON CONFLICT (name) DO UPDATE SET refcount = %s.refcount + EXCLUDED.refcount, updated_at = EXCLUDED.updated_at'
+            % (table, ', '.join(['(%s, %s, %s)'] * len(deltas)), table),
+            [value for name, delta in deltas for value in (name, delta, now)])
+
+def file_saved(instance, field_name, created, update_fields):
+    """
+    Moves a reference from the previous file of `field_name` to the new one, after
+    `instance` is saved.
+    """
+    if update_fields is not None and field_name not in update_fields:
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    if not created and field_name not in loaded:
+        #Deferred, so not saved.
+        return
+    name = getattr(instance, field_name).name or None
+    previous = None if created else loaded[field_name]
+    if name != previous:
+        adjust_references(Counter({name: 1, previous: -1}))
+    loaded[field_name] = name
+    instance._loaded_values = loaded
+
+def file_deleted(instance, field_name):
+    adjust_references({getattr(instance, field_name).name: -1})
+
+def recount_references():
+    """
+    Recomputes the reference counts of all the files from the referencing tables.
+    """
+    counts = Counter()
+    for model, field_name in REFERENCING_FIELDS:
+        for name, count in model._base_manager.values_list(field_name).annotate(count=Count('pk')).order_by():
+            counts[name] += count
+    counts = list(counts.items())
+    with transaction.atomic():
+        Blob.objects.update(refcount=0)
+        for start in range(0, len(counts), 1000):
+            adjust_references(dict(counts[start:start + 1000]))
+
+def is_old(name, cutoff, storage):
+    try:
+        return datetime.datetime.fromtimestamp(os.stat(storage.path(name)).st_mtime, datetime.timezone.utc) < cutoff
+    except FileNotFoundError:
+        return True
+
+def delete_blob(name, storage):
+    for variant_name in get_variant_names(name):
+        storage.delete(variant_name)
+    storage.delete(name)
+
+def delete_blobs(names, storage, workers=1):
+    """
+    Deletes the files `names`, with their variants, using `workers` threads.
+    """
+    if workers > 1 and len(names) > 1:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='portfolio-gc') as executor:
+            list(executor.map(partial(delete_blob, storage=storage), names))
+    else:
+        for name in names:
+            delete_blob(name, storage)
+
+def get_stored_blobs(storage):
+    """
+    Returns the names of the files in the blob directory of `storage`, without their variants.
+    """
+    directory = getattr(storage, 'blob_directory', None)
+    if directory is None or not os.path.isdir(storage.path(directory)):
+        return
+    for root, dirs, files in os.walk(storage.path(directory)):
+        if VARIANTS_DIRECTORY in dirs:
+            dirs.remove(VARIANTS_DIRECTORY)
+        for filename in files:
+            yield os.path.relpath(os.path.join(root, filename), storage.location).replace(os.sep, '/')
+
+def collect_garbage(grace=60 * 60, batch_size=500, scan=False, dry_run=False, storage=default_storage, names=None, workers=1):
+    """
+    Deletes the files, with their variants, unreferenced and unused for `grace` seconds,
+    by batches of `batch_size`. With `scan`, the blob directory is also searched for files
+    without references, like the ones of failed uploads. Returns the deleted names.
+
+    Given `names`, only those files are candidates, whenever their last reference was
+    removed, as done after purging deleted rows.
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=grace)
+    candidates = {'updated_at__lt': cutoff} if names is None else {'name__in': names}
+    deleted = []
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            #Locked, a file referenced again meanwhile waits for the collection or is skipped.
+            blobs = list(Blob.objects.select_for_update(skip_locked=True)
+                .filter(refcount__lte=0, pk__gt=last_id, **candidates).order_by('pk')[:batch_size])
+            if not blobs:
+                break
+            last_id = blobs[-1].pk
+            unused = [blob.name for blob in blobs if is_old(blob.name, cutoff, storage)]
+            if not dry_run:
+                delete_blobs(unused, storage, workers)
+                Blob.objects.filter(name__in=unused).delete()
+            deleted += unused
+    if scan:
+        stored = get_stored_blobs(storage)
+        collected = set(deleted)
+        while True:
+            batch = list(islice(stored, batch_size))
+            if not batch:
+                break
+            referenced = set(Blob.objects.filter(name__in=batch, refcount__gt=0).values_list('name', flat=True))
+            unreferenced = [name for name in batch if name not in referenced and name not in collected and is_old(name, cutoff, storage)]
+            if not dry_run:
+                delete_blobs(unreferenced, storage, workers)
+                Blob.objects.filter(name__in=unreferenced, refcount__lte=0).delete()
+            deleted += unreferenced
+    return deleted
@@ -0,0 +1,77 @@
+import gzip
+import asyncio
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .staticfiles import get_accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def get_compressors():
+    """
+    Returns the compressions of the responses as `(encoding, compress)`, preferred first.
+    The levels are lower than for the static files, they're compressed on each request.
+    """
+    compressors = []
+    if brotli is not None:
+        compressors.append(('br', lambda content: brotli.compress(content, quality=settings.COMPRESS_BROTLI_QUALITY)))
+    compressors.append(('gzip', lambda content: gzip.compress(content, compresslevel=settings.COMPRESS_GZIP_LEVEL, mtime=0)))
+    return compressors
+
+def is_compressible(response):
+    if response.streaming or response.has_header('Content-Encoding') or response.status_code < 200:
+        return False
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return content_type in settings.COMPRESS_CONTENT_TYPES
+
+class CompressionMiddleware:
+    """
+    Compresses the responses of the `settings.COMPRESS_CONTENT_TYPES`, like the API JSON,
+    with brotli or gzip, the first one accepted by the client. The responses smaller than
+    `settings.COMPRESS_MIN_SIZE` bytes are sent as they are.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.compressors = get_compressors()
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if not is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < settings.COMPRESS_MIN_SIZE:
+            return response
+        accepted = get_accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        for encoding, compress in self.compressors:
+            if encoding in accepted:
+                break
+        else:
+            return response
+        content = compress(response.content)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        #The compressed bytes differ, but the content is the same.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
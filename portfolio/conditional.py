@@ -0,0 +1,92 @@
+import hashlib
+
+from rest_framework.response import Response
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def touch(model, pk):
+    """
+    Sets the `updated_at` of the `model` instance `pk` to now, without sending signals.
+    """
+    model._base_manager.filter(pk=pk).update(updated_at=timezone.now())
+
+def get_queryset_version(queryset):
+    """
+    Returns the last modification time of the rows of `queryset` and a version changing
+    whenever one of them is added, changed or deleted.
+    """
+    aggregate = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+    return aggregate['last_modified'], aggregate['count']
+
+class ConditionalGetMixin:
+    """
+    Viewset mixin adding `ETag` and `Last-Modified` headers to the `list` and `retrieve`
+    responses, and answering 304 when the client already has them.
+
+    The tags are computed from the `updated_at` of the objects, before anything is
+    serialized. By default a list is versioned by the page served, its rows are loaded
+    and their versions compared without scanning the whole queryset. Views listing the
+    children of an object can use the parent `updated_at` instead, it's also updated
+    when a child changes, with `get_list_version`.
+    """
+    def get_list_version(self):
+        """
+        Returns the version of the list found without loading it, or None to version the page.
+        """
+        return None
+
+    def get_page_version(self, objects):
+        """
+        Returns the version of the served `objects`: their last modification time, their ids
+        and versions, and the pagination of the response, its count and links.
+        """
+        last_modified = max((obj.updated_at for obj in objects), default=None)
+        pagination = None
+        if self.paginator is not None:
+            pagination = list(self.paginator.get_paginated_response([]).data.items())
+        return last_modified, [(obj.pk, obj.updated_at) for obj in objects], pagination
+
+    def get_required_fields(self):
+        return super().get_required_fields() | {'updated_at'}
+
+    def get_object_version(self, instance):
+        return instance.updated_at, instance.pk
+
+    def get_etag(self, version):
+        request = self.request
+        key = repr((version, request.get_full_path(), request.accepted_media_type))
+        return '"%s"' % hashlib.md5(key.encode()).hexdigest()
+
+    def conditional_response(self, version, get_response):
+        last_modified = version[0] and int(version[0].timestamp())
+        etag = self.get_etag(version)
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = get_response()
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        version = self.get_list_version()
+        if version is not None:
+            return self.conditional_response(version, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        objects = list(queryset) if page is None else page
+        return self.conditional_response(self.get_page_version(objects), lambda: self.get_list_response(objects, page is not None))
+
+    def get_list_response(self, objects, paginated):
+        serializer = self.get_serializer(objects, many=True)
+        if paginated:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self.conditional_response(self.get_object_version(instance), lambda: Response(self.get_serializer(instance).data))
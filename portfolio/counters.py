@@ -0,0 +1,16 @@
+from django.core.cache import cache
+
+
+def increment(key, timeout=None):
+    """
+    Adds one to the cache counter `key` and returns its new value. A missing counter is
+    created, expiring after `timeout` seconds. The Redis cache increments atomically, so
+    concurrent requests each get their own value.
+    """
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        #Created by a concurrent request meanwhile.
+        return cache.incr(key)
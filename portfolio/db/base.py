@@ -0,0 +1,35 @@
+"""
+PostgreSQL backend whose connections are kept open in a pool of the process when Django
+closes them, and reused by the next ones opened with the same parameters. It's the
+Django backend otherwise, see `portfolio.db.pool` and the `POOL` database setting.
+"""
+from django.db.backends.postgresql import base, creation
+
+from .pool import get_pool, close_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        #The idle connections to the test database would prevent dropping it.
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params):
+        options = {name.lower(): value for name, value in self.settings_dict.get('POOL', {}).items()}
+        key = tuple(sorted((name, str(value)) for name, value in conn_params.items()))
+        return get_pool(key, **options)
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        connection = self.pool.get(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        #Set again for the reused connections.
+        self.isolation_level = self.settings_dict['OPTIONS'].get('isolation_level', connection.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.put(self.connection)
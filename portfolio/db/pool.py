@@ -0,0 +1,204 @@
+import os
+import time
+import threading
+
+import psycopg2
+from psycopg2 import extensions
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+class ConnectionPool:
+    """
+    Thread safe pool of open psycopg2 connections of one process.
+
+    Connections are reused last in, first out, so the extra ones stay idle and get
+    closed after `max_idle` seconds. A connection idle for more than `check_after`
+    seconds runs a `SELECT 1` before being reused. When `max_size` connections are in
+    use, a checkout waits up to `timeout` seconds for one to be returned.
+    """
+    def __init__(self, max_size=10, max_idle=300, check_after=30, timeout=10):
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self.timeout = timeout
+        self.pid = os.getpid()
+        self.condition = threading.Condition()
+        self.idle = []
+        self.size = 0
+        self.waiting = 0
+        self.counters = dict.fromkeys(('checkouts', 'reused', 'created', 'discarded', 'health_checks',
+            'failed_health_checks', 'waits', 'timeouts'), 0)
+        self.wait_time = 0.0
+
+    def check_fork(self):
+        #A forked process can't use the connections of its parent, they share the sockets. They're
+        #kept referenced but never used or closed, closing them would end the parent sessions.
+        if self.pid != os.getpid():
+            self.inherited = self.idle
+            self.idle = []
+            self.size = 0
+            self.waiting = 0
+            self.pid = os.getpid()
+
+    def is_healthy(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            healthy = True
+        except psycopg2.Error:
+            healthy = False
+        with self.condition:
+            self.counters['health_checks'] += 1
+            self.counters['failed_health_checks'] += not healthy
+        return healthy
+
+    def discard(self, connection):
+        self.counters['discarded'] += 1
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+    def pop_idle(self):
+        """
+        Returns the last given back idle connection still usable and its idle time in seconds,
+        or `(None, None)`. Called with the lock held.
+        """
+        while self.idle:
+            connection, returned_at = self.idle.pop()
+            idle_time = time.monotonic() - returned_at
+            if connection.closed or idle_time > self.max_idle:
+                self.size -= 1
+                self.discard(connection)
+                continue
+            return connection, idle_time
+        return None, None
+
+    def take(self):
+        """
+        Returns an idle connection and its idle time, or `(None, None)` when a place is reserved
+        for a new connection instead, waiting for one of them while the pool is full.
+        """
+        with self.condition:
+            start = None
+            while True:
+                connection, idle_time = self.pop_idle()
+                if connection is not None or self.size < self.max_size:
+                    break
+                if start is None:
+                    start = time.monotonic()
+                    self.counters['waits'] += 1
+                remaining = start + self.timeout - time.monotonic()
+                if remaining <= 0:
+                    self.counters['timeouts'] += 1
+                    raise psycopg2.OperationalError('No database connection available in the pool after %s seconds.' % self.timeout)
+                self.waiting += 1
+                self.condition.wait(remaining)
+                self.waiting -= 1
+            if connection is None:
+                self.size += 1
+            if start is not None:
+                self.wait_time += time.monotonic() - start
+            return connection, idle_time
+
+    def get(self, connect):
+        """
+        Returns an open connection, reused or created with `connect()`.
+
+        The health checks and the connection run without holding the lock, so a slow server
+        doesn't block the other threads taking and giving back connections.
+        """
+        with self.condition:
+            self.check_fork()
+            self.counters['checkouts'] += 1
+        while True:
+            connection, idle_time = self.take()
+            if connection is None:
+                break
+            if idle_time <= self.check_after or self.is_healthy(connection):
+                with self.condition:
+                    self.counters['reused'] += 1
+                return connection
+            with self.condition:
+                self.size -= 1
+                self.discard(connection)
+                self.condition.notify()
+        try:
+            connection = connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.counters['created'] += 1
+        return connection
+
+    def put(self, connection):
+        """
+        Gives back a connection taken with `get`, it's closed if it isn't reusable.
+        """
+        if self.pid != os.getpid():
+            return
+        #Rolled back before taking the lock, like the health checks.
+        reusable = not connection.closed
+        if reusable:
+            status = connection.get_transaction_status()
+            try:
+                if status in (extensions.TRANSACTION_STATUS_INTRANS, extensions.TRANSACTION_STATUS_INERROR):
+                    connection.rollback()
+                reusable = status != extensions.TRANSACTION_STATUS_UNKNOWN
+            except psycopg2.Error:
+                reusable = False
+        with self.condition:
+            if self.pid != os.getpid():
+                return
+            if reusable:
+                self.idle.append((connection, time.monotonic()))
+            else:
+                self.size -= 1
+                self.discard(connection)
+            self.condition.notify()
+
+    def close(self):
+        """
+        Closes the idle connections, the ones in use are closed when they're given back.
+        """
+        with self.condition:
+            self.check_fork()
+            for connection, returned_at in self.idle:
+                self.size -= 1
+                self.discard(connection)
+            self.idle = []
+
+    def get_stats(self):
+        with self.condition:
+            self.check_fork()
+            in_use = self.size - len(self.idle)
+            return dict(self.counters, max_size=self.max_size, size=self.size, idle=len(self.idle), in_use=in_use,
+                waiting=self.waiting, saturation=in_use / self.max_size, wait_time=round(self.wait_time, 6))
+
+def get_pool(key, **options):
+    """
+    Returns the pool of the connections with the parameters `key`, created with `options`.
+    """
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(**options)
+        return _pools[key]
+
+def get_pools_stats():
+    """
+    Returns the statistics of the pools of this process, by database name.
+    """
+    with _pools_lock:
+        pools = dict(_pools)
+    return {dict(key).get('database'): pool.get_stats() for key, pool in pools.items()}
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
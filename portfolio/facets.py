@@ -0,0 +1,103 @@
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+
+from django_countries import countries
+
+from .models import Portfoller, PortfollerFacet
+from .choices import CAREER_OPTIONS
+
+
+#Portfoller fields with a facet, each one is a filter of the home page.
+FACET_FIELDS = ('country_of_birth', 'career')
+FACETS_CACHE_KEY = 'portfolio:facets'
+
+Facet = namedtuple('Facet', ['value', 'label', 'count'])
+
+def get_label(field, value):
+    """
+    Returns the human readable name of a facet `value`.
+    """
+    if field == 'country_of_birth':
+        return countries.name(value)
+    return dict(CAREER_OPTIONS).get(value, value)
+
+def get_facets():
+    """
+    Returns a dict mapping each facet field to a list of `Facet`. The countries are the ones
+    of some portfoller, sorted by label, the careers are every `CAREER_OPTIONS`, in order.
+
+    The facets are read from the `PortfollerFacet` summary table, which has one row per
+    distinct value, and cached until the next change.
+    """
+    facets = cache.get(FACETS_CACHE_KEY)
+    if facets is None:
+        counts = {field: {} for field in FACET_FIELDS}
+        for field, value, count in PortfollerFacet.objects.filter(count__gt=0).values_list('field', 'value', 'count'):
+            counts[field][value] = count
+        facets = {
+            'country_of_birth': sorted((Facet(value, get_label('country_of_birth', value), count)
+                for value, count in counts['country_of_birth'].items()), key=lambda facet: facet.label),
+            'career': [Facet(value, label, counts['career'].get(value, 0)) for value, label in CAREER_OPTIONS],
+        }
+        cache.set(FACETS_CACHE_KEY, facets)
+    return facets
+
+def invalidate_facets():
+    #Deleted again after the commit, a concurrent read could have cached the old counts meanwhile.
+    cache.delete(FACETS_CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(FACETS_CACHE_KEY))
+
+def adjust_facet(field, value, delta):
+    """
+    Adds `delta` to the count of portfollers with `field` equal to `value`.
+    """
+    if not PortfollerFacet.objects.filter(field=field, value=value).update(count=F('count') + delta):
+        facet, created = PortfollerFacet.objects.get_or_create(field=field, value=value, defaults={'count': max(delta, 0)})
+        if not created:
+            PortfollerFacet.objects.filter(pk=facet.pk).update(count=F('count') + delta)
+    invalidate_facets()
+
+def get_stored_values(portfoller):
+    """
+    Returns the facet values of `portfoller` as they are in the database.
+    """
+    loaded = getattr(portfoller, '_loaded_values', {})
+    if all(field in loaded for field in FACET_FIELDS):
+        return {field: loaded[field] for field in FACET_FIELDS}
+    return Portfoller.objects.filter(pk=portfoller.pk).values(*FACET_FIELDS).first()
+
+def portfoller_saved(portfoller, created, previous):
+    """
+    Updates the facets after `portfoller` is saved, `previous` are its values before the save.
+    """
+    loaded = getattr(portfoller, '_loaded_values', {})
+    for field in FACET_FIELDS:
+        value = str(getattr(portfoller, field))
+        old_value = None if created or previous is None else str(previous[field])
+        loaded[field] = value
+        if value == old_value:
+            continue
+        if old_value is not None:
+            adjust_facet(field, old_value, -1)
+        adjust_facet(field, value, 1)
+    portfoller._loaded_values = loaded
+
+def portfoller_deleted(portfoller):
+    for field in FACET_FIELDS:
+        adjust_facet(field, str(getattr(portfoller, field)), -1)
+
+def rebuild_facets():
+    """
+    Recomputes every facet from the `Portfoller` table.
+    """
+    with transaction.atomic():
+        PortfollerFacet.objects.all().delete()
+        PortfollerFacet.objects.bulk_create([
+            PortfollerFacet(field=field, value=row[field], count=row['count'])
+            for field in FACET_FIELDS
+            for row in Portfoller.objects.order_by().values(field).annotate(count=Count('id'))
+        ])
+    invalidate_facets()
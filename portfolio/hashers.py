@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    Django PBKDF2 hasher with the number of iterations of `settings.PASSWORD_ITERATIONS`.
+    The hashes made with another number are rehashed on the next successful login.
+    """
+    @property
+    def iterations(self):
+        return settings.PASSWORD_ITERATIONS
@@ -0,0 +1,100 @@
+import os
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.dispatch import Signal
+from django.utils import timezone
+
+
+#Widths of the resized variants generated for every uploaded image.
+IMAGE_VARIANT_WIDTHS = {'small': 200, 'medium': 400, 'large': 800}
+#Formats of the variants, by file extension.
+IMAGE_VARIANT_FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+#Directory of the variants, next to their image.
+VARIANTS_DIRECTORY = 'variants'
+
+#Sent with the model as sender and the instance `pk` once new variants are saved.
+variants_updated = Signal()
+
+def get_variant_name(name, size, extension):
+    """
+    Returns the storage name of the `size` variant of the image `name`, in the `extension` format.
+    """
+    directory, filename = os.path.split(name)
+    return os.path.join(directory, VARIANTS_DIRECTORY, '%s_%s.%s' % (os.path.splitext(filename)[0], size, extension))
+
+def get_variant_names(name):
+    """
+    Returns the storage names of all the variants of the image `name`.
+    """
+    return [get_variant_name(name, size, extension) for size in IMAGE_VARIANT_WIDTHS for extension in IMAGE_VARIANT_FORMATS]
+
+def render_variant(image, width, image_format):
+    variant = image.copy()
+    variant.thumbnail((width, width), Image.LANCZOS)
+    if image_format == 'JPEG' and variant.mode != 'RGB':
+        variant = variant.convert('RGB')
+    output = BytesIO()
+    variant.save(output, image_format, quality=80)
+    return output.getvalue()
+
+def generate_variants(name, storage=default_storage):
+    """
+    Generates the resized variants of the image `name` and returns a dict describing them,
+    as stored in the `*_variants` model fields. Existing variants aren't rendered again.
+    """
+    variants = {'source': name, 'sizes': {}}
+    image = None
+    for size, width in IMAGE_VARIANT_WIDTHS.items():
+        variants['sizes'][size] = {'width': width}
+        for extension, image_format in IMAGE_VARIANT_FORMATS.items():
+            variant_name = get_variant_name(name, size, extension)
+            if not storage.exists(variant_name):
+                if image is None:
+                    with storage.open(name) as f:
+                        image = ImageOps.exif_transpose(Image.open(f))
+                        image.load()
+                    if image.mode not in ('RGB', 'RGBA'):
+                        image = image.convert('RGBA')
+                storage.save(variant_name, ContentFile(render_variant(image, width, image_format)))
+            variants['sizes'][size][extension] = variant_name
+    return variants
+
+def update_variants(model_label, pk, field_name):
+    """
+    Generates the variants of the image in `field_name` of an instance and saves them in the
+    instance `<field_name>_variants` field, unless the image was changed meanwhile. The
+    variants of the previous image are deleted with it, by `portfolio.blobs.collect_garbage`.
+    """
+    model = apps.get_model(model_label)
+    variants_field = field_name + '_variants'
+    name = model._base_manager.filter(pk=pk).values_list(field_name, flat=True).first()
+    if not name:
+        return
+    variants = generate_variants(name)
+    if model._base_manager.filter(pk=pk, **{field_name: name}).update(**{variants_field: variants, 'updated_at': timezone.now()}):
+        variants_updated.send(sender=model, pk=pk)
+
+def needs_variants(instance, field_name):
+    fieldfile = getattr(instance, field_name)
+    return bool(fieldfile) and getattr(instance, field_name + '_variants', {}).get('source') != fieldfile.name
+
+def get_variant_urls(variants, storage=default_storage):
+    """
+    Returns the URLs of `variants` as `{size: {'width': width, extension: url}}`.
+    """
+    urls = {}
+    for size, variant in variants.get('sizes', {}).items():
+        urls[size] = {key: value if key == 'width' else storage.url(value) for key, value in variant.items()}
+    return urls
+
+def get_srcset(variants, extension, storage=default_storage):
+    """
+    Returns the `srcset` attribute value listing the `extension` variants by width.
+    """
+    variants = sorted(get_variant_urls(variants, storage).values(), key=lambda urls: urls['width'])
+    return ', '.join('%s %sw' % (urls[extension], urls['width']) for urls in variants)
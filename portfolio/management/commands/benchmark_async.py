@@ -0,0 +1,136 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from portfolio.models import Project
+
+
+def percentile(timings, percent):
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(round(percent / 100 * (len(timings) - 1))))]
+
+def get_default_paths():
+    project = Project.objects.select_related('user').order_by('id').first()
+    if project is None:
+        raise CommandError('Add a portfoller with a project first, or give the paths to request.')
+    username = project.user.username
+    return ['/home/', '/users/%s/' % username, '/users/%s/%s/' % (username, project.project_name),
+        '/api/portfollers/', '/api/portfollers/%s/projects/' % username]
+
+class Command(BaseCommand):
+    help = ('Compares the throughput of the read pages and endpoints served by the WSGI application '
+            'with sync views and by the ASGI application with async views, with slow clients.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='Paths requested in turn, by default pages and endpoints of the first project.')
+        parser.add_argument('--requests', type=int, default=500, help='Number of requests of each run.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Number of clients connected at the same time.')
+        parser.add_argument('--workers', type=int, default=4, help='WSGI worker threads, and ASGI database threads.')
+        parser.add_argument('--client-delay', type=float, default=200, help='Milliseconds a client takes to read a response.')
+        parser.add_argument('--mode', choices=['wsgi', 'asgi'], help='Runs only one side and prints its results as JSON.')
+
+    def handle(self, *args, **options):
+        if options['mode']:
+            paths = options['paths'] or get_default_paths()
+            run = self.run_wsgi if options['mode'] == 'wsgi' else self.run_asgi
+            self.stdout.write(json.dumps(run(paths, options)))
+            return
+        #Each side runs in its own process, the views are made async or not when the URLs are loaded.
+        paths = options['paths'] or get_default_paths()
+        arguments = [str(value) for name in ('requests', 'concurrency', 'workers', 'client_delay')
+            for value in ('--' + name.replace('_', '-'), options[name])]
+        results = {}
+        for mode, async_views in (('wsgi', '0'), ('asgi', '1')):
+            env = dict(os.environ, ASYNC_VIEWS=async_views, ASYNC_WORKERS=str(options['workers']))
+            output = subprocess.run([sys.executable, sys.argv[0], 'benchmark_async', '--mode', mode] + arguments + paths,
+                env=env, stdout=subprocess.PIPE, check=True).stdout
+            results[mode] = json.loads(output.decode().strip().splitlines()[-1])
+        self.stdout.write('%-6s %10s %10s %10s %8s' % ('', 'req/s', 'p50 ms', 'p95 ms', 'errors'))
+        for mode, result in results.items():
+            self.stdout.write('%-6s %10.1f %10.1f %10.1f %8d' % (mode, result['throughput'], result['p50'], result['p95'], result['errors']))
+        self.stdout.write(self.style.SUCCESS('ASGI/WSGI throughput: %.2fx' % (results['asgi']['throughput'] / results['wsgi']['throughput'])))
+
+    def summarize(self, timings, statuses, elapsed):
+        return {
+            'throughput': len(timings) / elapsed,
+            'p50': percentile(timings, 50) * 1000,
+            'p95': percentile(timings, 95) * 1000,
+            'errors': sum(status >= 400 for status in statuses),
+        }
+
+    def run_wsgi(self, paths, options):
+        """
+        Serves the requests with the WSGI application in a fixed number of threads, like a
+        sync server: a thread is busy until its client read the whole response.
+        """
+        from portfoling.wsgi import application
+        factory = RequestFactory()
+        delay = options['client_delay'] / 1000
+
+        def request(index):
+            environ = factory.get(paths[index % len(paths)]).environ
+            status = []
+            start = time.perf_counter()
+            response = application(environ, lambda code, headers, exc_info=None: status.append(int(code.split()[0])))
+            for chunk in response:
+                pass
+            time.sleep(delay)
+            response.close()
+            return time.perf_counter() - start, status[0]
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            list(executor.map(request, range(options['workers'])))
+            start = time.perf_counter()
+            results = list(executor.map(request, range(options['requests'])))
+            elapsed = time.perf_counter() - start
+        return self.summarize([timing for timing, status in results], [status for timing, status in results], elapsed)
+
+    def run_asgi(self, paths, options):
+        """
+        Serves the requests with the ASGI application in one event loop, a slow client only
+        holds a coroutine.
+        """
+        from portfoling.asgi import application
+        delay = options['client_delay'] / 1000
+
+        async def request(index, semaphore):
+            path = paths[index % len(paths)]
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+                'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+                'headers': [(b'host', b'testserver')], 'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+            }
+            status = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif not message.get('more_body'):
+                    await asyncio.sleep(delay)
+
+            async with semaphore:
+                start = time.perf_counter()
+                await application(scope, receive, send)
+                return time.perf_counter() - start, status[0]
+
+        async def run(count):
+            semaphore = asyncio.Semaphore(options['concurrency'])
+            return await asyncio.gather(*[request(index, semaphore) for index in range(count)])
+
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(run(options['workers']))
+        start = time.perf_counter()
+        results = loop.run_until_complete(run(options['requests']))
+        elapsed = time.perf_counter() - start
+        loop.close()
+        return self.summarize([timing for timing, status in results], [status for timing, status in results], elapsed)
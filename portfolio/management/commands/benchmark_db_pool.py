@@ -0,0 +1,63 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.postgresql import base
+
+from portfolio.db import base as pooled_base
+from portfolio.db.pool import get_pools_stats, close_pools
+from .benchmark_async import percentile
+
+
+class Command(BaseCommand):
+    help = ('Compares requests opening and closing their own database connection, like without the '
+            'pool, to requests taking their connection from the pool.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Number of requests of each run.')
+        parser.add_argument('--threads', type=int, default=8, help='Threads making the requests.')
+        parser.add_argument('--database', default='default', help='Database to connect to.')
+
+    def handle(self, *args, **options):
+        #The first connection of the process loads the types of the database, the runs don't measure it.
+        connection = connections[options['database']]
+        connection.ensure_connection()
+        connection.close()
+        settings_dict = dict(connection.settings_dict)
+        results = {}
+        for name, wrapper_class in (('direct', base.DatabaseWrapper), ('pooled', pooled_base.DatabaseWrapper)):
+            results[name] = self.run(wrapper_class, settings_dict, options)
+        self.stdout.write('%-7s %10s %10s %10s' % ('', 'req/s', 'p50 ms', 'p95 ms'))
+        for name, result in results.items():
+            self.stdout.write('%-7s %10.1f %10.1f %10.1f' % (name, result['throughput'], result['p50'], result['p95']))
+        for database, stats in get_pools_stats().items():
+            self.stdout.write('Pool of %s: %s' % (database, ', '.join('%s=%s' % item for item in sorted(stats.items()))))
+        close_pools()
+        self.stdout.write(self.style.SUCCESS('Pooled/direct throughput: %.2fx' % (results['pooled']['throughput'] / results['direct']['throughput'])))
+
+    def run(self, wrapper_class, settings_dict, options):
+        """
+        Makes the requests in threads, each one connecting, reading a portfoller and closing
+        the connection, as Django does at the end of a request.
+        """
+        def request(index):
+            connection = wrapper_class(settings_dict)
+            start = time.perf_counter()
+            connection.ensure_connection()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT id, username FROM portfolio_portfoller ORDER BY id LIMIT 1')
+                cursor.fetchall()
+            connection.close()
+            return time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            list(executor.map(request, range(options['threads'])))
+            start = time.perf_counter()
+            timings = list(executor.map(request, range(options['requests'])))
+            elapsed = time.perf_counter() - start
+        return {
+            'throughput': len(timings) / elapsed,
+            'p50': percentile(timings, 50) * 1000,
+            'p95': percentile(timings, 95) * 1000,
+        }
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from rest_framework.renderers import JSONRenderer
+
+from portfolio import renderers
+from portfolio.compression import get_compressors
+from portfolio.pagination import KeysetPagination
+from portfolio.views import PortfollerViewSet
+
+
+class Command(BaseCommand):
+    help = ('Measures the time to render a page of the portfollers API list with the standard and the '
+            'fast JSON renderers, and its size on the wire with each compression.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=KeysetPagination.page_size, help='Portfollers in the page.')
+        parser.add_argument('--iterations', type=int, default=200, help='Renders measured for each renderer.')
+
+    def handle(self, *args, **options):
+        data = self.get_data(options['page_size'])
+        if not data['results']:
+            raise CommandError('Add some portfollers first.')
+        if renderers.orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed, the fast renderer uses the standard library.'))
+        self.stdout.write('%d portfollers, %d iterations' % (len(data['results']), options['iterations']))
+        self.stdout.write('%-10s %12s %10s' % ('renderer', 'ms/render', 'bytes'))
+        timings = {}
+        for name, renderer in (('standard', JSONRenderer()), ('fast', renderers.FastJSONRenderer())):
+            timings[name], content = self.measure(lambda: renderer.render(data, 'application/json'), options['iterations'])
+            self.stdout.write('%-10s %12.3f %10d' % (name, timings[name] * 1000, len(content)))
+        self.stdout.write('%-10s %12s %10s %8s' % ('encoding', 'ms/compress', 'bytes', 'ratio'))
+        for encoding, compress in get_compressors():
+            timing, compressed = self.measure(lambda: compress(content), options['iterations'])
+            self.stdout.write('%-10s %12.3f %10d %7.1f%%' % (encoding, timing * 1000, len(compressed), len(compressed) * 100 / len(content)))
+        self.stdout.write(self.style.SUCCESS('Fast/standard render speed: %.2fx' % (timings['standard'] / timings['fast'])))
+
+    def get_data(self, page_size):
+        pagination_class = type('BenchmarkPagination', (KeysetPagination,), {'page_size': page_size})
+        view = PortfollerViewSet.as_view({'get': 'list'}, pagination_class=pagination_class)
+        response = view(RequestFactory().get('/api/portfollers/'))
+        return response.data
+
+    def measure(self, func, iterations):
+        """
+        Returns the average time of `func` calls, in seconds, and its result.
+        """
+        result = func()
+        start = time.perf_counter()
+        for i in range(iterations):
+            func()
+        return (time.perf_counter() - start) / iterations, result
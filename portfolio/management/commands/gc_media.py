@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from portfolio.blobs import collect_garbage, recount_references
+
+
+class Command(BaseCommand):
+    help = 'Deletes the stored images, and their variants, no portfoller or project image references anymore.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace', type=int, default=60 * 60, help='Seconds a file stays after its last use.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Files deleted by transaction.')
+        parser.add_argument('--scan', action='store_true', help='Also searches the storage for files without references.')
+        parser.add_argument('--recount', action='store_true', help='Recomputes the reference counts first.')
+        parser.add_argument('--workers', type=int, default=1, help='Threads deleting the files.')
+        parser.add_argument('--dry-run', action='store_true', help='Lists the files without deleting them.')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            recount_references()
+        deleted = collect_garbage(options['grace'], options['batch_size'], options['scan'], options['dry_run'],
+            workers=options['workers'])
+        if options['verbosity'] > 1 or options['dry_run']:
+            for name in deleted:
+                self.stdout.write(name)
+        action = 'would be deleted' if options['dry_run'] else 'deleted'
+        self.stdout.write(self.style.SUCCESS('%s files %s.' % (len(deleted), action)))
@@ -0,0 +1,49 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from portfolio.models import Portfoller, ProjectImages
+from portfolio.images import update_variants
+
+
+#Models and fields with images variants.
+IMAGE_FIELDS = [(Portfoller, 'profile_picture'), (ProjectImages, 'image')]
+
+def run_job(job):
+    try:
+        update_variants(*job)
+        return None
+    except Exception as e:
+        return '%s %s: %s' % (job[0], job[1], e)
+    finally:
+        connections.close_all()
+
+class Command(BaseCommand):
+    help = 'Generates the resized variants of the existing images, spread across several processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(), help='Number of worker processes.')
+        parser.add_argument('--force', action='store_true', help='Update the images that already have variants too.')
+
+    def get_jobs(self, force):
+        for model, field_name in IMAGE_FIELDS:
+            rows = model._base_manager.exclude(**{field_name: ''}).exclude(**{field_name + '__isnull': True})
+            for pk, name, variants in rows.values_list('pk', field_name, field_name + '_variants').iterator():
+                if force or variants.get('source') != name:
+                    yield (model._meta.label, pk, field_name)
+
+    def handle(self, *args, **options):
+        jobs = list(self.get_jobs(options['force']))
+        self.stdout.write('Generating variants of %s images.' % len(jobs))
+        #The forked processes must not share the parent database connections.
+        connections.close_all()
+        errors = 0
+        with multiprocessing.get_context('fork').Pool(options['processes']) as pool:
+            for done, error in enumerate(pool.imap_unordered(run_job, jobs, chunksize=16), 1):
+                if error:
+                    errors += 1
+                    self.stderr.write(error)
+                if done % 100 == 0:
+                    self.stdout.write('%s/%s' % (done, len(jobs)))
+        self.stdout.write(self.style.SUCCESS('Done, %s errors.' % errors))
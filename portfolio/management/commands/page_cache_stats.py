@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from portfolio.pagecache import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = 'Shows the hits, misses and hit ratio of the profile and project pages cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Sets the counters back to zero after showing them.')
+
+    def handle(self, *args, **options):
+        for page, stats in get_stats().items():
+            ratio = '-' if stats['ratio'] is None else '{:.1%}'.format(stats['ratio'])
+            self.stdout.write('%s: %s hits, %s misses, hit ratio %s' % (page, stats['hits'], stats['misses'], ratio))
+        if options['reset']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset.'))
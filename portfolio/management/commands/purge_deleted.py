@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from portfolio.purge import purge_deleted, get_pending
+
+
+class Command(BaseCommand):
+    help = 'Removes the deleted projects and portfollers, with their images, resuming an interrupted purge.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.PURGE_BATCH_SIZE, help='Rows removed by transaction.')
+        parser.add_argument('--workers', type=int, default=settings.PURGE_WORKERS, help='Threads deleting the files.')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Pending: %(images)s images, %(projects)s projects, %(portfollers)s portfollers.' % get_pending())
+        report = self.report if options['verbosity'] > 1 else None
+        purged = purge_deleted(options['batch_size'], options['workers'], report)
+        self.stdout.write(self.style.SUCCESS(
+            'Purged %(images)s images, %(projects)s projects, %(portfollers)s portfollers and %(files)s files.' % purged))
+
+    def report(self, purged, pending):
+        self.stdout.write('Purged %s images, %s projects, %s portfollers; %s images, %s projects, %s portfollers left.' % (
+            purged['images'], purged['projects'], purged['portfollers'],
+            pending['images'], pending['projects'], pending['portfollers']))
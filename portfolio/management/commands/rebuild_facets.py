@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from portfolio.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the country and career facets from the portfollers table.'
+
+    def handle(self, *args, **options):
+        rebuild_facets()
+        self.stdout.write(self.style.SUCCESS('Facets rebuilt.'))
@@ -0,0 +1,91 @@
+import time
+import signal
+import logging
+import threading
+import multiprocessing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from portfolio.db.pool import close_pools
+from portfolio.tasks import work, retry_failed, get_worker_stats, get_queue_stats
+
+
+logger = logging.getLogger('portfolio.tasks')
+
+class Command(BaseCommand):
+    help = 'Runs the queued background tasks, like the images variants generation and the purges.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=settings.BACKGROUND_WORKERS, help='Threads of each process running tasks.')
+        parser.add_argument('--processes', type=int, default=1, help='Processes running tasks.')
+        parser.add_argument('--poll-interval', type=float, default=settings.TASK_POLL_INTERVAL,
+            help='Seconds waited when the queue is empty.')
+        parser.add_argument('--stats-interval', type=float, default=60, help='Seconds between the logs of the queue statistics.')
+        parser.add_argument('--once', action='store_true', help='Stops when the queue is empty.')
+        parser.add_argument('--retry-failed', action='store_true', help='Queues the failed tasks again first.')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            self.stdout.write('%s failed tasks queued again.' % retry_failed())
+        self.stop = threading.Event()
+        if options['processes'] > 1:
+            self.run_processes(options)
+        else:
+            self.run_process(options)
+
+    def handle_signal(self, signum, frame):
+        self.stop.set()
+
+    def run_processes(self, options):
+        #The processes open their own connections.
+        connections.close_all()
+        close_pools()
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=self.run_process, args=(options,), daemon=False) for i in range(options['processes'])]
+        for process in processes:
+            process.start()
+        signal.signal(signal.SIGTERM, self.handle_signal)
+        signal.signal(signal.SIGINT, self.handle_signal)
+        while any(process.is_alive() for process in processes):
+            if self.stop.wait(1):
+                for process in processes:
+                    process.terminate()
+                break
+        for process in processes:
+            process.join()
+
+    def run_process(self, options):
+        before = get_worker_stats()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.handle_signal)
+            signal.signal(signal.SIGINT, self.handle_signal)
+        if options['threads'] <= 1:
+            #In the main thread, like when called by the tests, the connection is left open.
+            work(self.stop, options['poll_interval'], options['once'])
+        else:
+            threads = [threading.Thread(target=self.run_thread, args=(options,), name='portfolio-tasks-%s' % i)
+                for i in range(options['threads'])]
+            for thread in threads:
+                thread.start()
+            logged = time.monotonic()
+            while any(thread.is_alive() for thread in threads):
+                self.stop.wait(1)
+                if time.monotonic() - logged >= options['stats_interval']:
+                    logged = time.monotonic()
+                    logger.info('Queue: %s', get_queue_stats())
+                    connections.close_all()
+            for thread in threads:
+                thread.join()
+        stats = {key: value - before[key] for key, value in get_worker_stats().items()}
+        done = stats['succeeded'] + stats['retried'] + stats['failed']
+        self.stdout.write(self.style.SUCCESS('Tasks run: %s succeeded, %s retried, %s failed, waited %.2f s and ran %.2f s on average.' % (
+            stats['succeeded'], stats['retried'], stats['failed'],
+            stats['wait_time'] / done if done else 0.0, stats['run_time'] / done if done else 0.0)))
+
+    def run_thread(self, options):
+        try:
+            work(self.stop, options['poll_interval'], options['once'])
+        finally:
+            connections.close_all()
@@ -0,0 +1,122 @@
+import os
+import re
+import mimetypes
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+from django.views import View
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+MEDIA_CACHE_CONTROL = 'public, max-age=86400'
+
+class RangeFile:
+    """
+    File object reading only `length` bytes from `start`. The servers sending files with
+    `sendfile` use its `fileno` and `tell`, and stop at the `Content-Length`.
+    """
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+def get_range(header, size):
+    """
+    Returns the `(start, length)` of the byte range of a `Range` header, `None` when the
+    header isn't a single byte range, or `(None, None)` when the range isn't satisfiable.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        #The last bytes.
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return None, None
+    return start, end - start + 1
+
+class MediaView(View):
+    """
+    Serves the uploaded files of `settings.MEDIA_ROOT`, with support for conditional and
+    range requests. The files are streamed from disk, with `sendfile` when the server
+    supports it, or sent by the web server with `settings.MEDIA_OFFLOAD`.
+    """
+    http_method_names = ['get', 'head']
+
+    def has_permission(self, request, name):
+        """
+        Returns if the file `name` can be sent to the user of `request`, all can by default.
+        """
+        return True
+
+    def get(self, request, path):
+        try:
+            full_path = safe_join(settings.MEDIA_ROOT, path)
+        except SuspiciousFileOperation:
+            raise Http404
+        if not os.path.isfile(full_path) or not self.has_permission(request, path):
+            raise Http404
+        stat = os.stat(full_path)
+        etag = '"%x-%x"' % (int(stat.st_mtime), stat.st_size)
+        last_modified = int(stat.st_mtime)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = self.get_file_response(request, full_path, path, stat.st_size, etag)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = MEDIA_CACHE_CONTROL
+        return response
+
+    def get_file_response(self, request, full_path, path, size, etag):
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        if settings.MEDIA_OFFLOAD:
+            #The web server sends the file, and answers the range requests.
+            response = HttpResponse(content_type=content_type)
+            if settings.MEDIA_OFFLOAD == 'x-accel-redirect':
+                response['X-Accel-Redirect'] = settings.MEDIA_OFFLOAD_PREFIX + path
+            else:
+                response['X-Sendfile'] = full_path
+            return response
+        byte_range = None
+        if 'HTTP_RANGE' in request.META:
+            #A client with a changed file gets it whole.
+            if_range = request.META.get('HTTP_IF_RANGE')
+            if if_range is None or etag in parse_etags(if_range):
+                byte_range = get_range(request.META['HTTP_RANGE'], size)
+        if byte_range == (None, None):
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */%d' % size
+            return response
+        file = open(full_path, 'rb')
+        if byte_range is None:
+            response = FileResponse(file, content_type=content_type)
+        else:
+            start, length = byte_range
+            response = FileResponse(RangeFile(file, start, length), content_type=content_type, status=206)
+            response['Content-Length'] = length
+            response['Content-Range'] = 'bytes %d-%d/%d' % (start, start + length - 1, size)
+        response['Accept-Ranges'] = 'bytes'
+        return response
@@ -0,0 +1,33 @@
+# Generated by Django 3.1.1 on 2026-10-18 11:31
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Concat, Lower, Trim
+
+
+def populate_fullname(apps, schema_editor):
+    Portfoller = apps.get_model('portfolio', 'Portfoller')
+    Portfoller.objects.update(fullname=Lower(Trim(Concat('first_name', Value(' '), 'last_name'))))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0002_auto_20201112_0629'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='portfoller',
+            name='fullname',
+            field=models.CharField(default='', editable=False, max_length=101),
+        ),
+        migrations.RunPython(populate_fullname, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='portfoller',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['fullname'], name='portfoller_fullname_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
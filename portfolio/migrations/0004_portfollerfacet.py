@@ -0,0 +1,37 @@
+# Generated by Django 3.1.1 on 2026-10-18 11:33
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_facets(apps, schema_editor):
+    Portfoller = apps.get_model('portfolio', 'Portfoller')
+    PortfollerFacet = apps.get_model('portfolio', 'PortfollerFacet')
+    PortfollerFacet.objects.bulk_create([
+        PortfollerFacet(field=field, value=row[field], count=row['count'])
+        for field in ('country_of_birth', 'career')
+        for row in Portfoller.objects.order_by().values(field).annotate(count=Count('id'))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0003_portfoller_fullname'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfollerFacet',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('field', 'value')},
+            },
+        ),
+        migrations.RunPython(populate_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.1 on 2026-10-18 11:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0004_portfollerfacet'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='portfoller',
+            index=models.Index(fields=['fullname', 'id'], name='portfoller_fullname_id'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['user', 'project_name', 'id'], name='project_user_name_id'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.1.1 on 2026-10-18 12:17
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def count_references(apps, schema_editor):
+    """
+    Counts the references to the files stored before.
+    """
+    Portfoller = apps.get_model('portfolio', 'Portfoller')
+    ProjectImages = apps.get_model('portfolio', 'ProjectImages')
+    Blob = apps.get_model('portfolio', 'Blob')
+    default = Portfoller._meta.get_field('profile_picture').default
+    counts = Counter(Portfoller.objects.exclude(profile_picture=default).values_list('profile_picture', flat=True))
+    counts.update(ProjectImages.objects.values_list('image', flat=True))
+    Blob.objects.bulk_create([Blob(name=name, refcount=count) for name, count in counts.items() if name], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0007_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('refcount', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='blob',
+            index=models.Index(condition=models.Q(refcount__lte=0), fields=['updated_at'], name='blob_unreferenced'),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.1.1 on 2026-10-18 12:22
+
+from django.db import migrations, models
+import portfolio.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0008_blob'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='portfoller',
+            managers=[
+                ('objects', portfolio.models.PortfollerManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='portfoller',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='portfoller',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='portfoller_deleted'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='project_deleted'),
+        ),
+    ]
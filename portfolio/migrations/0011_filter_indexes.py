@@ -0,0 +1,25 @@
+# Generated by Django 3.1.1 on 2026-10-18 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0010_task'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='portfoller',
+            index=models.Index(fields=['career', 'fullname', 'id'], name='portfoller_career_fullname'),
+        ),
+        migrations.AddIndex(
+            model_name='portfoller',
+            index=models.Index(fields=['country_of_birth', 'fullname', 'id'], name='portfoller_country_fullname'),
+        ),
+        migrations.AddIndex(
+            model_name='portfoller',
+            index=models.Index(fields=['date_joined', 'id'], name='portfoller_date_joined_id'),
+        ),
+    ]
@@ -3,7 +3,8 @@ import datetime
 
 from django.conf import settings
 from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.contrib.postgres.indexes import GinIndex
 from django.utils import timezone
 
 from django_countries.fields import CountryField
@@ -26,6 +27,26 @@ def project_images_path(instance, filename):
     """
     return os.path.join("images", "user_%s" % instance.project.user.username, "project_%s" % instance.project.project_name, filename)
 
+def build_fullname(first_name, last_name):
+    """
+    Returns the normalized full name stored in `Portfoller.fullname`.
+    """
+    return ' '.join(' '.join([first_name or '', last_name or '']).split()).lower()
+
+class PortfollerManager(UserManager):
+    """
+    Manager of the portfollers, without the deleted ones waiting to be purged.
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+class ProjectManager(models.Manager):
+    """
+    Manager of the projects, without the deleted ones waiting to be purged.
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 class Portfoller(AbstractUser):
     first_name = models.CharField(max_length=50)
     last_name = models.CharField(max_length=50)
@@ -35,10 +56,52 @@ class Portfoller(AbstractUser):
     career = models.CharField(max_length=20, choices=CAREER_OPTIONS, default='Developer')
     email = models.EmailField(max_length=254, unique=True)
     profile_picture = models.ImageField(upload_to=profile_picture_path, default='generic_user.png', validators=[validate_file_size])
+    #Resized copies of `profile_picture`, see `portfolio.images`.
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
     biography = models.TextField(max_length=1000, null=True, blank=True)
+    #Normalized "first_name last_name", stored so searches and ordering can use an index.
+    fullname = models.CharField(max_length=101, editable=False, default='')
+    #Also updated when one of the portfoller projects changes, see `portfolio.conditional`.
+    updated_at = models.DateTimeField(auto_now=True)
+    #Set when the portfoller is deleted, its rows are removed later, see `portfolio.purge`.
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = PortfollerManager()
+    all_objects = models.Manager()
 
     REQUIRED_FIELDS = ['password', 'first_name', 'last_name', 'birthdate', 'country_of_birth', 'email']
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            #Trigram index used by the name search, see `portfolio.search`.
+            GinIndex(fields=['fullname'], name='portfoller_fullname_trgm', opclasses=['gin_trgm_ops']),
+            #Ordering and keyset pagination of the portfollers list.
+            models.Index(fields=['fullname', 'id'], name='portfoller_fullname_id'),
+            #The same ordering filtered by career or country of birth, and the ordering by join date.
+            models.Index(fields=['career', 'fullname', 'id'], name='portfoller_career_fullname'),
+            models.Index(fields=['country_of_birth', 'fullname', 'id'], name='portfoller_country_fullname'),
+            models.Index(fields=['date_joined', 'id'], name='portfoller_date_joined_id'),
+            #Portfollers waiting to be purged.
+            models.Index(fields=['deleted_at'], name='portfoller_deleted', condition=models.Q(deleted_at__isnull=False)),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Keep the stored `fullname` in sync with `first_name` and `last_name`.
+        """
+        self.fullname = build_fullname(self.first_name, self.last_name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'first_name', 'last_name'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'fullname'}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        #Keep the loaded values, so signal handlers can tell what changed on save.
+        instance._loaded_values = {name: value for name, value in zip(field_names, values) if value is not models.DEFERRED}
+        return instance
+
     def get_age(self):
         now = timezone.now()
         return now.year - self.birthdate.year - ((now.month, now.day) < (self.birthdate.month, self.birthdate.day))
@@ -57,6 +120,20 @@ class Project(models.Model):
     user = models.ForeignKey(Portfoller, related_name='projects', on_delete=models.CASCADE)
     project_name = models.CharField(max_length=50, validators=[validate_project_name])
     project_description = models.TextField(max_length=1024, null=True, blank=True)
+    #Also updated when one of the project images changes, see `portfolio.conditional`.
+    updated_at = models.DateTimeField(auto_now=True)
+    #Set when the project is deleted, its rows are removed later, see `portfolio.purge`.
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = ProjectManager()
+    all_objects = models.Manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        #Keep the loaded values, so signal handlers can tell what changed on save.
+        instance._loaded_values = {name: value for name, value in zip(field_names, values) if value is not models.DEFERRED}
+        return instance
 
     def __str__(self):
         return self.project_name
@@ -64,7 +141,81 @@ class Project(models.Model):
     class Meta:
         #The project name must be unique in the Portfoller profile.
         unique_together = ('project_name', 'user')
+        indexes = [
+            #Ordering and keyset pagination of a portfoller projects.
+            models.Index(fields=['user', 'project_name', 'id'], name='project_user_name_id'),
+            #Projects waiting to be purged.
+            models.Index(fields=['deleted_at'], name='project_deleted', condition=models.Q(deleted_at__isnull=False)),
+        ]
+
+class PortfollerFacet(models.Model):
+    """
+    Number of portfollers for each value of a filterable field, maintained by `portfolio.facets`.
+    """
+    field = models.CharField(max_length=20)
+    value = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return '%s=%s (%s)' % (self.field, self.value, self.count)
+
+    class Meta:
+        unique_together = ('field', 'value')
 
 class ProjectImages(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
-    image = models.ImageField(upload_to=project_images_path, null=True, blank=True, validators=[validate_file_size])
\ No newline at end of file
+    image = models.ImageField(upload_to=project_images_path, null=True, blank=True, validators=[validate_file_size])
+    #Resized copies of `image`, see `portfolio.images`.
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        #Keep the loaded values, so signal handlers can tell what changed on save.
+        instance._loaded_values = {name: value for name, value in zip(field_names, values) if value is not models.DEFERRED}
+        return instance
+
+class Blob(models.Model):
+    """
+    Number of references to a stored file from the portfollers and project images, the
+    unreferenced files are deleted by the `gc_media` command, see `portfolio.blobs`.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    refcount = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return '%s (%s)' % (self.name, self.refcount)
+
+    class Meta:
+        indexes = [
+            #Garbage collection candidates.
+            models.Index(fields=['updated_at'], name='blob_unreferenced', condition=models.Q(refcount__lte=0)),
+        ]
+
+class Task(models.Model):
+    """
+    Function call run off the request path by the workers, see `portfolio.tasks`.
+    """
+    #Dotted path of the function.
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    #When the task is due, also pushed back while it runs and before a retry.
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    started_at = models.DateTimeField(null=True, blank=True)
+    #Set when the last attempt failed, the task is kept for inspection.
+    failed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return '%s%r' % (self.name, tuple(self.args))
+
+    class Meta:
+        indexes = [
+            #Due tasks, claimed in order by the workers.
+            models.Index(fields=['run_at', 'id'], name='task_due', condition=models.Q(failed_at__isnull=True)),
+        ]
@@ -0,0 +1,150 @@
+import random
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+from .models import Portfoller, Project
+from .counters import increment
+
+
+#Pages cached by `PageCacheMixin`, each one has its own hit and miss counters.
+CACHED_PAGES = ('profile', 'project')
+#Versions of a page: what visitors see and what the portfoller sees on their own pages.
+PAGE_VARIANTS = ('anonymous', 'owner')
+PAGE_CACHE_PREFIX = 'portfolio:page'
+PAGE_STATS_PREFIX = 'portfolio:pagestats'
+
+def get_page_key(variant, username, project_name=None):
+    """
+    Returns the cache key of the `variant` of a profile page, or of a project page
+    when `project_name` is given.
+    """
+    page = 'profile' if project_name is None else 'project'
+    path = username if project_name is None else '%s/%s' % (username, project_name)
+    return '%s:%s:%s:%s' % (PAGE_CACHE_PREFIX, page, variant, hashlib.md5(path.encode()).hexdigest())
+
+def get_page_keys(username, project_name=None):
+    return [get_page_key(variant, username, project_name) for variant in PAGE_VARIANTS]
+
+def invalidate_pages(keys):
+    #Deleted again after the commit, a concurrent request could have cached the old page meanwhile.
+    keys = list(keys)
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+def count_request(page, hit):
+    #Only a sample of the requests is counted, the others don't write to the cache.
+    if random.random() < settings.PAGE_CACHE_STATS_RATE:
+        increment('%s:%s:%s' % (PAGE_STATS_PREFIX, page, 'hits' if hit else 'misses'))
+
+def get_stats():
+    """
+    Returns the hits, misses and hit ratio of each cached page since the last reset. The
+    counts are estimated from the sample counted, see `settings.PAGE_CACHE_STATS_RATE`.
+    """
+    stats = {}
+    rate = settings.PAGE_CACHE_STATS_RATE
+    for page in CACHED_PAGES:
+        hits = round(cache.get('%s:%s:hits' % (PAGE_STATS_PREFIX, page), 0) / rate)
+        misses = round(cache.get('%s:%s:misses' % (PAGE_STATS_PREFIX, page), 0) / rate)
+        requests = hits + misses
+        stats[page] = {'hits': hits, 'misses': misses, 'ratio': hits / requests if requests else None}
+    return stats
+
+def reset_stats():
+    cache.delete_many(['%s:%s:%s' % (PAGE_STATS_PREFIX, page, counter) for page in CACHED_PAGES for counter in ('hits', 'misses')])
+
+class PageCacheMixin:
+    """
+    Detail view mixin caching the rendered page by the `username` and `project_name`
+    URL kwargs, until one of the objects shown in it changes, see `portfolio.signals`.
+
+    Anonymous visitors share one version of the page and the portfoller has another one
+    with the edit links. Pages seen by other signed in portfollers aren't cached, they
+    show their username.
+    """
+    cached_page = None
+
+    def get_page_variant(self):
+        user = self.request.user
+        if not user.is_authenticated:
+            return 'anonymous'
+        if user.username == self.kwargs['username']:
+            return 'owner'
+        return None
+
+    def get(self, request, *args, **kwargs):
+        variant = self.get_page_variant()
+        if variant is None:
+            return super().get(request, *args, **kwargs)
+        key = get_page_key(variant, self.kwargs['username'], self.kwargs.get('project_name'))
+        cached = cache.get(key)
+        count_request(self.cached_page, cached is not None)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        response = super().get(request, *args, **kwargs)
+        response.render()
+        if response.status_code == 200:
+            cache.set(key, (response.content, response['Content-Type']), settings.PAGE_CACHE_TIMEOUT)
+        return response
+
+def get_username(project):
+    if Project._meta.get_field('user').is_cached(project):
+        return project.user.username
+    return Portfoller.objects.filter(pk=project.user_id).values_list('username', flat=True).first()
+
+def portfoller_saved(portfoller, update_fields):
+    """
+    Invalidates the profile page of `portfoller`, and its project pages when the username changed.
+    """
+    if update_fields is not None and set(update_fields) <= {'last_login', 'password'}:
+        return
+    loaded = getattr(portfoller, '_loaded_values', {})
+    previous = loaded.get('username', portfoller.username)
+    keys = get_page_keys(portfoller.username)
+    if previous != portfoller.username:
+        keys += get_page_keys(previous)
+        for project_name in Project.objects.filter(user=portfoller).values_list('project_name', flat=True):
+            keys += get_page_keys(previous, project_name)
+    loaded['username'] = portfoller.username
+    portfoller._loaded_values = loaded
+    invalidate_pages(keys)
+
+def portfoller_deleted(portfoller):
+    invalidate_pages(get_page_keys(portfoller.username))
+
+def project_changed(project):
+    """
+    Invalidates the page of `project`, also under its previous name, and the profile page listing it.
+    """
+    username = get_username(project)
+    if username is None:
+        return
+    loaded = getattr(project, '_loaded_values', {})
+    keys = get_page_keys(username) + get_page_keys(username, project.project_name)
+    previous = loaded.get('project_name', project.project_name)
+    if previous != project.project_name:
+        keys += get_page_keys(username, previous)
+    loaded['project_name'] = project.project_name
+    project._loaded_values = loaded
+    invalidate_pages(keys)
+
+def projects_changed(username, project_names):
+    """
+    Invalidates the profile page of `username` and the pages of its `project_names`, for
+    changes saved without signals.
+    """
+    keys = get_page_keys(username)
+    for project_name in project_names:
+        keys += get_page_keys(username, project_name)
+    invalidate_pages(keys)
+
+def project_images_changed(project_id):
+    row = Project.objects.filter(pk=project_id).values_list('user__username', 'project_name').first()
+    if row is not None:
+        invalidate_pages(get_page_keys(*row))
@@ -0,0 +1,250 @@
+import json
+import base64
+import datetime
+import binascii
+from collections import OrderedDict, namedtuple
+
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+
+from .resultcache import get_results_key
+
+
+#Below this estimated number of rows the exact count is cheap, so it's used instead.
+EXACT_COUNT_THRESHOLD = 1000
+
+class InvalidCursor(Exception):
+    pass
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    Keeps the microseconds the `DjangoJSONEncoder` cuts from the times, the rows joined in
+    the same millisecond would otherwise be repeated, or never passed, between the pages.
+    The ISO strings are parsed back by the filters of the date fields.
+    """
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+def encode_cursor(values, reverse=False):
+    data = json.dumps({'v': values, 'r': int(reverse)}, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Returns the `(values, reverse)` tuple encoded in `cursor`.
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+        return list(data['v']), bool(data['r'])
+    except (TypeError, ValueError, KeyError, binascii.Error):
+        raise InvalidCursor(cursor)
+
+def approximate_count(queryset):
+    """
+    Returns the planner estimate of the number of rows of `queryset`, or the exact number if
+    the estimate is small.
+    """
+    queryset = queryset.order_by()
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimate = int(plan[0]['Plan']['Plan Rows'])
+    if estimate < EXACT_COUNT_THRESHOLD:
+        return queryset.count()
+    return estimate
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return encode_cursor(self.paginator.get_position(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return encode_cursor(self.paginator.get_position(self.object_list[0]), reverse=True)
+
+class KeysetPaginator:
+    """
+    Paginates an ordered queryset by filtering on the values of its ordering fields, so any
+    page costs the same as the first one and no `COUNT(*)` is needed.
+
+    The ordering is taken from the queryset and completed with `pk` to make it unique,
+    ordering fields can't be nullable.
+    """
+    def __init__(self, queryset, per_page):
+        self.per_page = per_page
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        if not {'pk', '-pk', 'id', '-id'} & set(ordering):
+            ordering.append('pk')
+        self.ordering = [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+        self.queryset = queryset.order_by(*ordering)
+
+    @property
+    def count(self):
+        return approximate_count(self.queryset)
+
+    def get_position(self, obj):
+        return [getattr(obj, 'pk' if field == 'id' else field) for field, descending in self.ordering]
+
+    def get_position_filter(self, values, reverse):
+        """
+        Returns a `Q` selecting the rows after the position `values`, or before it if `reverse`.
+        """
+        if len(values) != len(self.ordering):
+            raise InvalidCursor(values)
+        position = Q()
+        for index in reversed(range(len(self.ordering))):
+            field, descending = self.ordering[index]
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition = Q(**{'%s__%s' % (field, lookup): values[index]})
+            position = condition if index == len(self.ordering) - 1 else condition | (Q(**{field: values[index]}) & position)
+        field, descending = self.ordering[0]
+        #Redundant bound on the first field, it lets the database range scan its index.
+        return Q(**{'%s__%s' % (field, 'lte' if descending != reverse else 'gte'): values[0]}) & position
+
+    def page(self, cursor=None):
+        queryset = self.queryset
+        values, reverse = decode_cursor(cursor) if cursor else (None, False)
+        if values is not None:
+            try:
+                queryset = queryset.filter(self.get_position_filter(values, reverse))
+            except (ValueError, TypeError, ValidationError):
+                #Well formed cursor with values not fitting the ordering fields.
+                raise InvalidCursor(cursor)
+        if reverse:
+            queryset = queryset.reverse()
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if reverse:
+            object_list.reverse()
+            return KeysetPage(object_list, self, has_next=True, has_previous=has_more)
+        return KeysetPage(object_list, self, has_next=has_more, has_previous=values is not None)
+
+class KeysetPaginationMixin:
+    """
+    `ListView` mixin that paginates with `KeysetPaginator`, the page is selected by the
+    `cursor` GET parameter.
+    """
+    cursor_kwarg = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404('Invalid cursor')
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    API pagination with `KeysetPaginator`. Responses have opaque `next` and `previous` links
+    and an approximate `count`, which can be skipped with `?count=false`.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.paginator = KeysetPaginator(queryset, self.page_size)
+        try:
+            self.page = self.paginator.page(request.query_params.get(self.cursor_query_param))
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+        self.count = None
+        if request.query_params.get(self.count_query_param, 'true').lower() not in ('false', '0'):
+            self.count = self.paginator.count
+        return list(self.page)
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_link(self.page.next_cursor)),
+            ('previous', self.get_link(self.page.previous_cursor)),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+#Page rebuilt from the cache, with the links of the page it was cached from.
+CachedPage = namedtuple('CachedPage', ['next_cursor', 'previous_cursor'])
+
+class CachedKeysetPagination(KeysetPagination):
+    """
+    `KeysetPagination` caching the ids, the links and the count of each page for
+    `settings.RESULTS_CACHE_TIMEOUT` seconds, by the view `results_cache_params` query
+    parameters. The same page requested again is loaded by primary key, the filters are
+    only checked on its rows, without the ordering, the scan of the index and the count.
+    """
+    def paginate_queryset(self, queryset, request, view=None):
+        params = tuple(view.results_cache_params) + (self.cursor_query_param, self.count_query_param)
+        key = get_results_key(request, 'page:%s' % self.page_size, params)
+        cached = cache.get(key)
+        if cached is None:
+            object_list = super().paginate_queryset(queryset, request, view)
+            cache.set(key, ([obj.pk for obj in object_list], self.count, self.page.next_cursor, self.page.previous_cursor),
+                settings.RESULTS_CACHE_TIMEOUT)
+            return object_list
+        ids, self.count, next_cursor, previous_cursor = cached
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page = CachedPage(next_cursor, previous_cursor)
+        #The rows deleted or no longer matching since are left out.
+        objects = queryset.order_by().in_bulk(ids)
+        return [objects[pk] for pk in ids if pk in objects]
@@ -0,0 +1,149 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import ManyRelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch, prefetch_related_objects
+
+
+def get_meta_option(serializer, name, default=None):
+    if isinstance(serializer, ListSerializer):
+        serializer = serializer.child
+    return getattr(getattr(serializer, 'Meta', None), name, default)
+
+def get_model_field(model, name):
+    """
+    Returns the field `name` of `model`, the reverse relations are also found by their
+    accessor name, like `projectimages_set`.
+    """
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        for field in model._meta.related_objects:
+            if field.get_accessor_name() == name:
+                return field
+        raise
+
+def get_related_lookups(serializer, model, prefix='', prefetching=False):
+    """
+    Returns the `(select_related, prefetch_related)` lookups of the relations of `model` that
+    `serializer` reads, following nested serializers.
+    """
+    if isinstance(serializer, ListSerializer):
+        serializer = serializer.child
+    select_related, prefetch_related = [], []
+    for field in serializer.fields.values():
+        if field.source == '*':
+            continue
+        try:
+            model_field = get_model_field(model, field.source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+        lookup = prefix + field.source
+        many = model_field.one_to_many or model_field.many_to_many
+        nested = field.child_relation if isinstance(field, ManyRelatedField) else field
+        ordering = get_meta_option(nested, 'ordering')
+        if many and ordering:
+            #Nested lists are sent in the order of their serializer.
+            prefetch_related.append(Prefetch(lookup, queryset=model_field.related_model._default_manager.order_by(*ordering)))
+        elif many or prefetching:
+            prefetch_related.append(lookup)
+        else:
+            select_related.append(lookup)
+        if isinstance(nested, BaseSerializer):
+            nested_select, nested_prefetch = get_related_lookups(nested, model_field.related_model, lookup + '__', many or prefetching)
+            select_related += nested_select
+            prefetch_related += nested_prefetch
+    return select_related, prefetch_related
+
+def prefetch_for_serializer(queryset, serializer):
+    """
+    Returns `queryset` loading, in a fixed number of queries, every relation read by `serializer`.
+    """
+    select_related, prefetch_related = get_related_lookups(serializer, queryset.model)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
+
+def get_only_fields(serializer, model):
+    """
+    Returns the names of the `model` fields `serializer` reads, for `QuerySet.only()`, or None
+    when they can't be known, like for a field reading a property. The fields computed by the
+    serializer from model fields list them in its `Meta.field_sources`.
+    """
+    if isinstance(serializer, ListSerializer):
+        serializer = serializer.child
+    field_sources = get_meta_option(serializer, 'field_sources', {})
+    names = {model._meta.pk.name}
+    for name, field in serializer.fields.items():
+        if name in field_sources:
+            names.update(field_sources[name])
+            continue
+        if field.source == '*':
+            return None
+        attribute = field.source.split('.')[0]
+        if attribute == 'pk':
+            continue
+        try:
+            model_field = get_model_field(model, attribute)
+        except FieldDoesNotExist:
+            if hasattr(model, attribute):
+                return None
+            #Missing from the instances, the serializer skips it.
+            continue
+        if model_field.concrete and not model_field.many_to_many:
+            names.add(model_field.name)
+    return names
+
+def get_ordering_fields(queryset):
+    names = set()
+    for ordering in queryset.query.order_by or queryset.model._meta.ordering:
+        if isinstance(ordering, str):
+            try:
+                names.add(queryset.model._meta.get_field(ordering.lstrip('-')).name)
+            except FieldDoesNotExist:
+                pass
+    return names
+
+def only_for_serializer(queryset, serializer, required=()):
+    """
+    Returns `queryset` loading only the columns `serializer` reads, its ordering fields and the
+    `required` ones. The querysets joining relations are returned as they are.
+    """
+    names = get_only_fields(serializer, queryset.model)
+    if names is None or queryset.query.select_related:
+        return queryset
+    return queryset.only(*(names | get_ordering_fields(queryset) | set(required)))
+
+def prefetch_instances_for_serializer(instances, serializer):
+    """
+    Like `prefetch_for_serializer`, for already loaded `instances`.
+    """
+    if instances:
+        select_related, prefetch_related = get_related_lookups(serializer, type(instances[0]))
+        prefetch_related_objects(instances, *(select_related + prefetch_related))
+
+class SerializerPrefetchMixin:
+    """
+    Viewset mixin loading the relations the serializer of the current action reads, so the
+    number of queries doesn't depend on the number of serialized objects. On the reads, only
+    the columns the serializer outputs are loaded.
+    """
+    def get_required_fields(self):
+        """
+        Returns the names of the model fields the view reads besides the serializer ones.
+        """
+        return set()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer = self.get_serializer()
+        queryset = prefetch_for_serializer(queryset, serializer)
+        if self.request.method in SAFE_METHODS:
+            #The instances saved by the writes need all their fields.
+            queryset = only_for_serializer(queryset, serializer, self.get_required_fields())
+        return queryset
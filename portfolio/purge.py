@@ -0,0 +1,147 @@
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import CharField, Exists, OuterRef, Value
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
+
+from .models import Portfoller, Project, ProjectImages
+from .background import run_in_background
+from .conditional import touch
+from .blobs import adjust_references, collect_garbage
+from . import facets, pagecache
+
+
+logger = logging.getLogger(__name__)
+
+#Value replacing the unique fields of the deleted rows, so they are free again at once. The
+#colon isn't allowed in usernames and project names.
+TOMBSTONE_NAME = Concat(Value('deleted:'), Cast('id', CharField()))
+
+def delete_projects(portfoller, projects):
+    """
+    Deletes the `projects` of `portfoller` in the request: they're marked as deleted and
+    hidden, their rows and images are removed in the background by `purge_deleted`.
+    """
+    if not projects:
+        return
+    with transaction.atomic():
+        Project.all_objects.filter(pk__in=[project.pk for project in projects]).update(
+            deleted_at=timezone.now(), project_name=TOMBSTONE_NAME)
+        touch(Portfoller, portfoller.pk)
+        run_in_background(purge_deleted)
+    pagecache.projects_changed(portfoller.username, [project.project_name for project in projects])
+
+def delete_portfoller(portfoller):
+    """
+    Deletes `portfoller` and its projects in the request, like `delete_projects`.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        project_names = list(Project.objects.filter(user=portfoller).values_list('project_name', flat=True))
+        Portfoller.all_objects.filter(pk=portfoller.pk).update(
+            deleted_at=now, is_active=False, username=TOMBSTONE_NAME, email=TOMBSTONE_NAME)
+        Project.all_objects.filter(user=portfoller, deleted_at__isnull=True).update(deleted_at=now)
+        facets.portfoller_deleted(portfoller)
+        run_in_background(purge_deleted)
+    pagecache.projects_changed(portfoller.username, project_names)
+
+def purge_images(batch_size):
+    """
+    Removes up to `batch_size` images of the deleted projects, returns their files names.
+    """
+    images = connection.ops.quote_name(ProjectImages._meta.db_table)
+    projects = connection.ops.quote_name(Project._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        #Skipping the locked rows, concurrent purges remove different batches.
+        cursor.execute(
+            'DELETE FROM %s WHERE id IN (SELECT i.id FROM %s i JOIN %s p ON p.id = i.project_id '
+            'WHERE p.deleted_at IS NOT NULL LIMIT %%s FOR UPDATE OF i SKIP LOCKED) RETURNING image'
+            % (images, images, projects), [batch_size])
+        names = [name for name, in cursor.fetchall()]
+        #Bulk deleted without signals, the references are removed here.
+        adjust_references(Counter({name: -count for name, count in Counter(names).items()}))
+    return names
+
+def purge_projects(batch_size):
+    """
+    Removes up to `batch_size` deleted projects without images left, returns their number.
+    """
+    images = connection.ops.quote_name(ProjectImages._meta.db_table)
+    projects = connection.ops.quote_name(Project._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM %s WHERE id IN (SELECT p.id FROM %s p WHERE p.deleted_at IS NOT NULL '
+            'AND NOT EXISTS (SELECT 1 FROM %s i WHERE i.project_id = p.id) LIMIT %%s FOR UPDATE SKIP LOCKED)'
+            % (projects, projects, images), [batch_size])
+        return cursor.rowcount
+
+def purge_portfollers(batch_size):
+    """
+    Removes up to `batch_size` deleted portfollers without projects left, returns their
+    profile pictures names.
+    """
+    names = []
+    with transaction.atomic():
+        portfollers = (Portfoller.all_objects.select_for_update(skip_locked=True)
+            .filter(deleted_at__isnull=False)
+            .filter(~Exists(Project.all_objects.filter(user=OuterRef('pk'))))[:batch_size])
+        for portfoller in portfollers:
+            #Few rows, deleted with their groups, permissions and admin logs by the ORM.
+            portfoller.delete()
+            names.append(portfoller.profile_picture.name)
+    return names
+
+def get_pending():
+    """
+    Returns the numbers of deleted images, projects and portfollers not purged yet.
+    """
+    return {
+        'images': ProjectImages.objects.filter(project__deleted_at__isnull=False).count(),
+        'projects': Project.all_objects.filter(deleted_at__isnull=False).count(),
+        'portfollers': Portfoller.all_objects.filter(deleted_at__isnull=False).count(),
+    }
+
+def purge_deleted(batch_size=None, workers=None, report=None):
+    """
+    Removes the rows of the deleted projects and portfollers, by batches of `batch_size`
+    rows each in its own transaction, and deletes the files they were the last to reference
+    using `workers` threads. Returns the numbers of removed images, projects, portfollers
+    and files.
+
+    The deleted rows are the progress: a purge stopped midway is resumed by the next one,
+    and concurrent purges share the work. `report(purged, pending)` is called after each batch.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    workers = workers or settings.PURGE_WORKERS
+    purged = {'images': 0, 'projects': 0, 'portfollers': 0, 'files': 0}
+
+    def collect(names):
+        if names:
+            purged['files'] += len(collect_garbage(settings.PURGE_MEDIA_GRACE, batch_size, names=names, workers=workers))
+        if report is not None:
+            report(dict(purged), get_pending())
+
+    while True:
+        names = purge_images(batch_size)
+        if not names:
+            break
+        purged['images'] += len(names)
+        collect(sorted(set(names)))
+    while True:
+        count = purge_projects(batch_size)
+        if not count:
+            break
+        purged['projects'] += count
+        collect([])
+    while True:
+        names = purge_portfollers(batch_size)
+        if not names:
+            break
+        purged['portfollers'] += len(names)
+        collect(sorted(set(names)))
+    if any(purged.values()):
+        logger.info('Purged %(images)s images, %(projects)s projects, %(portfollers)s portfollers and %(files)s files', purged)
+    return purged
@@ -0,0 +1,57 @@
+from django.conf import settings
+
+from rest_framework.utils import encoders
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+#Types the fast encoder doesn't know, like the lazy translations, and the dates, formatted
+#differently, are converted by the DRF encoder.
+default_encoder = encoders.JSONEncoder()
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer encoding with `orjson` when it's installed, several times faster than the
+    standard library on the serializers data. The output is compact UTF-8 JSON parsed to the
+    same values as the one of `JSONRenderer`, but not always the same bytes: the exponents of
+    the floats are written without `+`, and the NaN and infinite floats, which `JSONRenderer`
+    refuses, are written as null.
+
+    The indented output, asked by the browsable API or `; indent=` in the `Accept` header,
+    and the settings the fast encoder doesn't support fall back to `JSONRenderer`.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=default_encoder.default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        #Escaped like `JSONRenderer` does, so the output is a strict JavaScript subset.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+class FastJSONParser(JSONParser):
+    """
+    JSON parser decoding with `orjson` when it's installed, see `FastJSONRenderer`.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            content = stream.read() if stream is not None else b''
+            if encoding.lower().replace('-', '') != 'utf8':
+                content = content.decode(encoding)
+            return orjson.loads(content)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,26 @@
+from django.shortcuts import get_object_or_404
+
+from .models import Portfoller, Project
+
+
+class NestedObjectsMixin:
+    """
+    View mixin resolving the `Portfoller` and `Project` of the `username` and `project_name`
+    URL kwargs once per request, every method of the view reuses the same instances.
+
+    The project is loaded together with its owner in one query.
+    """
+    def get_portfoller(self):
+        if not hasattr(self, '_portfoller'):
+            if 'project_name' in self.kwargs:
+                self.get_project()
+            else:
+                self._portfoller = get_object_or_404(Portfoller, username=self.kwargs['username'])
+        return self._portfoller
+
+    def get_project(self):
+        if not hasattr(self, '_project'):
+            self._project = get_object_or_404(Project.objects.select_related('user'),
+                user__username=self.kwargs['username'], project_name=self.kwargs['project_name'])
+            self._portfoller = self._project.user
+        return self._project
@@ -0,0 +1,13 @@
+import hashlib
+
+
+RESULTS_CACHE_PREFIX = 'portfolio:results'
+
+def get_results_key(request, name, params):
+    """
+    Returns the cache key of the `name` results of `request`, which only depend on its path
+    and on the query parameters `params`, in any order.
+    """
+    values = [(param, request.query_params.getlist(param)) for param in sorted(params)]
+    digest = hashlib.md5(repr((request.path, values)).encode()).hexdigest()
+    return '%s:%s:%s' % (RESULTS_CACHE_PREFIX, name, digest)
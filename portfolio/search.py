@@ -0,0 +1,66 @@
+from django.db.models import CharField, FloatField, Func, Q, Value
+from django.db.models.lookups import PostgresOperatorLookup
+
+from .models import build_fullname
+
+
+@CharField.register_lookup
+class TrigramWordSimilar(PostgresOperatorLookup):
+    """
+    `fullname__trigram_word_similar=term` matches rows where `term` is similar to some word
+    extent of the column, it can be answered by the `gin_trgm_ops` index.
+    """
+    lookup_name = 'trigram_word_similar'
+    postgres_operator = '%%>'
+
+class TrigramWordSimilarity(Func):
+    """
+    The pg_trgm `word_similarity(string, expression)` score, between 0 and 1.
+    """
+    function = 'WORD_SIMILARITY'
+    #As double precision, so the score round trips exactly through pagination cursors.
+    template = '%(function)s(%(expressions)s)::float8'
+    output_field = FloatField()
+
+    def __init__(self, string, expression, **extra):
+        if not hasattr(string, 'resolve_expression'):
+            string = Value(string)
+        super().__init__(string, expression, **extra)
+
+def search_portfollers(queryset, term):
+    """
+    Returns `queryset` filtered by the name search `term` and ordered by relevance.
+
+    A portfoller matches if `term` is a substring of its full name or if it is close enough
+    to a word of it (typo tolerance). Both conditions use the trigram index on `fullname`,
+    so the cost doesn't grow with the table size.
+    """
+    term = build_fullname(term, '')
+    if not term:
+        return queryset
+    queryset = queryset.filter(Q(fullname__contains=term) | Q(fullname__trigram_word_similar=term))
+    return queryset.annotate(rank=TrigramWordSimilarity(term, 'fullname')).order_by('-rank', 'fullname', 'id')
+
+#Orderings of the portfollers lists, completed by `id` for the keyset pagination, each one
+#has an index.
+PORTFOLLER_ORDERINGS = {
+    'fullname': ('fullname', 'id'),
+    '-fullname': ('-fullname', '-id'),
+    'date_joined': ('date_joined', 'id'),
+    '-date_joined': ('-date_joined', '-id'),
+}
+
+def filter_portfollers(queryset, term='', career='All', country='All', ordering=None):
+    """
+    Returns `queryset` filtered like the portfollers list: by `career` and `country` of birth,
+    'All' matching any, and by the name search `term`. The results are ordered by relevance
+    when searching, or by `ordering`, a key of `PORTFOLLER_ORDERINGS`, if it's given.
+    """
+    if career != 'All':
+        queryset = queryset.filter(career=career)
+    if country != 'All':
+        queryset = queryset.filter(country_of_birth=country)
+    queryset = search_portfollers(queryset, term)
+    if ordering is not None:
+        queryset = queryset.order_by(*PORTFOLLER_ORDERINGS[ordering])
+    return queryset
@@ -1,20 +1,96 @@
-from rest_framework import serializers
+from collections import OrderedDict
+
+from rest_framework import serializers, exceptions
+from rest_framework.permissions import SAFE_METHODS
 
-from django.contrib.auth import authenticate
 from django.contrib.auth.hashers import make_password
 
 from .models import *
 from .choices import *
+from .images import get_variant_urls
+from .throttling import authenticate_throttled, LoginThrottled
 
 from django_countries.serializers import CountryFieldMixin
 
 
+def get_field_names(request, param):
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+def get_read_request(serializer):
+    """
+    Returns the request of a read if `serializer` is the one of its response, not a nested one.
+    """
+    request = serializer.context.get('request')
+    parent = serializer.parent.parent if isinstance(serializer.parent, serializers.ListSerializer) else serializer.parent
+    if request is None or parent is not None or request.method not in SAFE_METHODS:
+        return None
+    return request
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin keeping only the fields named in the `fields` query parameter, or all but
+    the `exclude` ones, both comma separated, in the responses to the reads. The nested
+    serializers keep their fields.
+    """
+    def get_fields(self):
+        fields = super().get_fields()
+        request = get_read_request(self)
+        if request is None:
+            return fields
+        requested = get_field_names(request, 'fields')
+        excluded = get_field_names(request, 'exclude') or set()
+        unknown = ((requested or set()) | excluded) - set(fields)
+        if unknown:
+            raise serializers.ValidationError({'fields': ['Unknown fields: %s.' % ', '.join(sorted(unknown))]})
+        return OrderedDict((name, field) for name, field in fields.items()
+            if (requested is None or name in requested) and name not in excluded)
+
+class ExpandableFieldsMixin:
+    """
+    Serializer mixin replacing the fields returned by `get_expandable_fields` with nested
+    serializers when they're named in the `expand` query parameter, comma separated. The
+    nested expansions are dotted, like `projects.images`.
+    """
+    def __init__(self, *args, expand=None, **kwargs):
+        self.expand = expand
+        super().__init__(*args, **kwargs)
+
+    def get_expandable_fields(self):
+        """
+        Returns `{field_name: function(expand)}`, the function returning the nested serializer.
+        """
+        return {}
+
+    def get_expand(self):
+        if self.expand is not None:
+            return self.expand
+        request = get_read_request(self)
+        return (request and get_field_names(request, 'expand')) or set()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self.get_expand()
+        expandable = self.get_expandable_fields()
+        names = {name.split('.')[0] for name in expand}
+        unknown = names - set(expandable)
+        if unknown:
+            raise serializers.ValidationError({'expand': ['Unknown fields: %s.' % ', '.join(sorted(unknown))]})
+        for name in names:
+            fields[name] = expandable[name]({nested.split('.', 1)[1] for nested in expand if nested.startswith(name + '.')})
+        return fields
+
 class LoginSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField()
 
     def validate(self, attrs):
-        user = authenticate(username=attrs['username'], password=attrs['password'])
+        try:
+            user = authenticate_throttled(self.context.get('request'), attrs['username'], attrs['password'])
+        except LoginThrottled as throttled:
+            raise exceptions.Throttled(throttled.wait)
 
         if not user:
             raise serializers.ValidationError('Incorrect email or password.')
@@ -36,8 +112,11 @@ class CreatePortfollerSerializer(CountryFieldMixin, serializers.ModelSerializer)
         fields = ('username', 'password', 'first_name', 'last_name', 'gender', 'birthdate', 
         'country_of_birth', 'career', 'email', 'profile_picture', 'biography')
 
-class PortfollerSerializer(CountryFieldMixin, serializers.ModelSerializer):
+class PortfollerSerializer(SparseFieldsMixin, ExpandableFieldsMixin, CountryFieldMixin, serializers.ModelSerializer):
     projects = serializers.SlugRelatedField(many=True, read_only=True, slug_field='project_name')
+
+    def get_expandable_fields(self):
+        return {'projects': lambda expand: ProjectSerializer(many=True, read_only=True, expand=expand)}
     
     def update(self, instance, validated_data):
         """
@@ -58,17 +137,39 @@ class PortfollerSerializer(CountryFieldMixin, serializers.ModelSerializer):
         fields = ('username', 'first_name', 'last_name', 'gender', 'birthdate', 'country_of_birth', 'career',
         'email', 'profile_picture', 'biography', 'projects')
     
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsMixin, ExpandableFieldsMixin, serializers.ModelSerializer):
     portfoller = PortfollerSerializer(many=False, read_only=True)
 
+    def get_expandable_fields(self):
+        return {'images': lambda expand: ProjectImageSerializer(many=True, read_only=True, source='projectimages_set', expand=expand)}
+
     class Meta:
         model = Project
         fields = ['portfoller', 'project_name', 'project_description']
+        #Order of the nested lists, see `portfolio.prefetch.get_related_lookups`.
+        ordering = ['project_name', 'id']
 
-class ProjectImageSerializer(serializers.ModelSerializer):
+class ProjectImageSerializer(SparseFieldsMixin, ExpandableFieldsMixin, serializers.ModelSerializer):
     project_instance = ProjectSerializer(many=False, read_only=True)
+    variants = serializers.SerializerMethodField()
+
+    def get_variants(self, obj):
+        """
+        Returns the URLs of the resized variants of the image, by size and format.
+        """
+        request = self.context.get('request')
+        variants = get_variant_urls(obj.image_variants)
+        if request is not None:
+            for urls in variants.values():
+                for key, url in urls.items():
+                    if key != 'width':
+                        urls[key] = request.build_absolute_uri(url)
+        return variants
 
     class Meta:
         model = ProjectImages
-        fields = ['pk', 'project_instance', 'image']
+        fields = ['pk', 'project_instance', 'image', 'variants']
+        #Model fields read by the method fields, see `portfolio.prefetch.get_only_fields`.
+        field_sources = {'variants': ['image_variants']}
+        ordering = ['id']
         
\ No newline at end of file
@@ -0,0 +1,107 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Portfoller, Project, ProjectImages
+from .background import run_in_background
+from .images import needs_variants, update_variants, variants_updated
+from .conditional import touch
+from . import facets, pagecache, blobs
+
+
+@receiver(pre_save, sender=Portfoller)
+def portfoller_pre_save(sender, instance, raw, update_fields, **kwargs):
+    instance._facet_previous = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not set(facets.FACET_FIELDS) & set(update_fields):
+        return
+    instance._facet_previous = facets.get_stored_values(instance)
+
+@receiver(post_save, sender=Portfoller)
+def portfoller_post_save(sender, instance, created, raw, update_fields, **kwargs):
+    if raw:
+        return
+    if not created and instance._facet_previous is None:
+        return
+    facets.portfoller_saved(instance, created, instance._facet_previous)
+
+@receiver(post_save, sender=Portfoller)
+def portfoller_profile_picture_variants(sender, instance, raw, **kwargs):
+    if not raw and needs_variants(instance, 'profile_picture'):
+        run_in_background(update_variants, 'portfolio.Portfoller', instance.pk, 'profile_picture')
+
+@receiver(post_delete, sender=Portfoller)
+def portfoller_post_delete(sender, instance, **kwargs):
+    #A purged portfoller was already removed from the facets when it was deleted.
+    if instance.deleted_at is None:
+        facets.portfoller_deleted(instance)
+
+@receiver(post_save, sender=Portfoller)
+def portfoller_file_post_save(sender, instance, created, raw, update_fields, **kwargs):
+    if not raw:
+        blobs.file_saved(instance, 'profile_picture', created, update_fields)
+
+@receiver(post_delete, sender=Portfoller)
+def portfoller_file_post_delete(sender, instance, **kwargs):
+    blobs.file_deleted(instance, 'profile_picture')
+
+@receiver(post_save, sender=Portfoller)
+def portfoller_page_post_save(sender, instance, raw, update_fields, **kwargs):
+    if not raw:
+        pagecache.portfoller_saved(instance, update_fields)
+
+@receiver(post_delete, sender=Portfoller)
+def portfoller_page_post_delete(sender, instance, **kwargs):
+    pagecache.portfoller_deleted(instance)
+
+@receiver(post_save, sender=Project)
+def project_page_post_save(sender, instance, raw, **kwargs):
+    if not raw:
+        pagecache.project_changed(instance)
+
+@receiver(post_delete, sender=Project)
+def project_page_post_delete(sender, instance, **kwargs):
+    pagecache.project_changed(instance)
+
+@receiver(post_save, sender=ProjectImages)
+@receiver(post_delete, sender=ProjectImages)
+def project_image_page_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        pagecache.project_images_changed(instance.project_id)
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def project_touch_portfoller(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch(Portfoller, instance.user_id)
+
+@receiver(post_save, sender=ProjectImages)
+@receiver(post_delete, sender=ProjectImages)
+def project_image_touch_project(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch(Project, instance.project_id)
+
+@receiver(variants_updated, sender=Portfoller)
+def portfoller_variants_updated(sender, pk, **kwargs):
+    for username in Portfoller.objects.filter(pk=pk).values_list('username', flat=True):
+        pagecache.invalidate_pages(pagecache.get_page_keys(username))
+
+@receiver(variants_updated, sender=ProjectImages)
+def project_image_variants_updated(sender, pk, **kwargs):
+    for project_id in ProjectImages.objects.filter(pk=pk).values_list('project_id', flat=True):
+        touch(Project, project_id)
+        pagecache.project_images_changed(project_id)
+
+@receiver(post_save, sender=ProjectImages)
+def project_image_variants(sender, instance, raw, **kwargs):
+    if not raw and needs_variants(instance, 'image'):
+        run_in_background(update_variants, 'portfolio.ProjectImages', instance.pk, 'image')
+
+@receiver(post_save, sender=ProjectImages)
+def project_image_file_post_save(sender, instance, created, raw, update_fields, **kwargs):
+    if not raw:
+        blobs.file_saved(instance, 'image', created, update_fields)
+
+@receiver(post_delete, sender=ProjectImages)
+def project_image_file_post_delete(sender, instance, **kwargs):
+    blobs.file_deleted(instance, 'image')
@@ -0,0 +1,169 @@
+import os
+import gzip
+import asyncio
+import mimetypes
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+#Extensions of the files already compressed, they aren't compressed again.
+COMPRESSED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.woff', '.woff2', '.gz', '.br', '.zip')
+#Compressed copies are kept only when smaller than this ratio of the original.
+MIN_COMPRESSION_RATIO = 0.95
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+#Files without a hash in their name may change on the next collectstatic.
+UNHASHED_CACHE_CONTROL = 'public, max-age=3600'
+
+def get_compressors():
+    """
+    Returns the available compressions as `(encoding, extension, compress)`, preferred first.
+    """
+    compressors = []
+    if brotli is not None:
+        compressors.append(('br', '.br', lambda content: brotli.compress(content, quality=11)))
+    compressors.append(('gzip', '.gz', lambda content: gzip.compress(content, compresslevel=9, mtime=0)))
+    return compressors
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Static files storage adding a hash of their content to the files names, and saving
+    gzip and brotli copies of the compressible files when they're collected.
+
+    The files missing from the manifest, like when `collectstatic` wasn't run, are served
+    under their own name instead of raising an error.
+    """
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(paths) | set(self.hashed_files.values()):
+            self.compress(name)
+
+    def compress(self, name):
+        if name.lower().endswith(COMPRESSED_EXTENSIONS):
+            return
+        with self.open(name) as original:
+            content = original.read()
+        for encoding, extension, compress in get_compressors():
+            compressed = compress(content)
+            if self.exists(name + extension):
+                self.delete(name + extension)
+            if len(compressed) < len(content) * MIN_COMPRESSION_RATIO:
+                self._save(name + extension, ContentFile(compressed))
+
+StaticFile = namedtuple('StaticFile', ['path', 'content_type', 'mtime', 'immutable', 'encodings'])
+
+def get_accepted_encodings(header):
+    """
+    Returns the content codings accepted by an `Accept-Encoding` header.
+    """
+    accepted = set()
+    for coding in header.split(','):
+        coding, *params = [part.strip() for part in coding.split(';')]
+        quality = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+class StaticFilesMiddleware:
+    """
+    Serves the files collected in `settings.STATIC_ROOT`, without a web server in front of
+    the application. The hashed names are cached by the clients for a year, and the
+    compressed copies are sent to the clients accepting them.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.STATIC_URL or not settings.STATIC_URL.startswith('/') or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = settings.STATIC_ROOT
+        #The collected files don't change while the process runs, they're looked up once.
+        self.files = {}
+        self.hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        #Under ASGI the chain is async, Django then awaits this middleware instead of
+        #running it in the single thread of the sync code.
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        response = self.process_request(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        response = self.process_request(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+    def process_request(self, request):
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefix):
+            static_file = self.get_static_file(request.path_info[len(self.prefix):])
+            if static_file is not None:
+                return self.serve(request, static_file)
+        return None
+
+    def get_static_file(self, name):
+        if name in self.files:
+            return self.files[name]
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        content_type, encoding = mimetypes.guess_type(path)
+        encodings = [(encoding, path + extension) for encoding, extension, compress in get_compressors()
+            if os.path.isfile(path + extension)]
+        static_file = StaticFile(path, content_type or 'application/octet-stream', int(os.stat(path).st_mtime),
+            name in self.hashed_names, encodings)
+        self.files[name] = static_file
+        return static_file
+
+    def serve(self, request, static_file):
+        accepted = get_accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        encoding, path = next(((encoding, path) for encoding, path in static_file.encodings if encoding in accepted),
+            (None, static_file.path))
+        etag = '"%x-%s"' % (static_file.mtime, encoding or 'identity')
+        response = get_conditional_response(request, etag=etag, last_modified=static_file.mtime)
+        if response is None:
+            response = FileResponse(open(path, 'rb'), content_type=static_file.content_type)
+            if encoding:
+                response['Content-Encoding'] = encoding
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(static_file.mtime)
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if static_file.immutable else UNHASHED_CACHE_CONTROL
+        if static_file.encodings:
+            response['Vary'] = 'Accept-Encoding'
+        return response
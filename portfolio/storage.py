@@ -0,0 +1,43 @@
+import os
+import hashlib
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+from .images import VARIANTS_DIRECTORY
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage naming the saved files by the SHA-256 of their content, under
+    `blob_directory`. A file uploaded many times, to many projects or portfollers, is
+    stored once, its references are counted by `portfolio.blobs`.
+
+    The images variants keep the name they're given, next to their image.
+    """
+    blob_directory = 'cas'
+
+    def get_blob_name(self, name, content):
+        sha256 = hashlib.sha256()
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        digest = sha256.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        return '/'.join([self.blob_directory, digest[:2], digest[2:4], digest + extension])
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        if VARIANTS_DIRECTORY in name.replace('\\', '/').split('/')[:-1]:
+            return super().save(name, content, max_length)
+        name = self.get_blob_name(name, content)
+        if self.exists(name):
+            #Marked as used, the garbage collection keeps the recently used files.
+            os.utime(self.path(name))
+            return name
+        #Written aside and moved, concurrent saves of the same content replace it with the same bytes.
+        temporary_name = super().save(name + '.tmp', content, max_length)
+        os.replace(self.path(temporary_name), self.path(name))
+        return name
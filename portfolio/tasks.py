@@ -0,0 +1,164 @@
+import time
+import logging
+import datetime
+import threading
+import traceback
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+
+logger = logging.getLogger(__name__)
+
+#Longest wait, in seconds, of a worker which can't reach the database.
+MAX_ERROR_BACKOFF = 60
+
+_stats_lock = threading.Lock()
+_stats = {'succeeded': 0, 'retried': 0, 'failed': 0, 'wait_time': 0.0, 'run_time': 0.0}
+
+def get_task_name(func):
+    return '%s.%s' % (func.__module__, func.__qualname__)
+
+def enqueue(func, *args, run_at=None, max_attempts=None):
+    """
+    Queues the call `func(*args)`, due at `run_at` or now. The task is saved in the current
+    transaction, the workers see it once committed. `args` must be JSON serializable.
+    """
+    return enqueue_many(func, [args], run_at, max_attempts)[0]
+
+def enqueue_many(func, args_list, run_at=None, max_attempts=None):
+    """
+    Queues a call of `func` for each arguments tuple of `args_list`, with one query.
+    """
+    name = get_task_name(func)
+    run_at = run_at or timezone.now()
+    max_attempts = max_attempts or settings.TASK_MAX_ATTEMPTS
+    return Task.objects.bulk_create([
+        Task(name=name, args=list(args), run_at=run_at, max_attempts=max_attempts) for args in args_list
+    ])
+
+def claim(pk=None):
+    """
+    Returns the next due task, or the task `pk` if it's due, marked as started. Its `run_at`
+    is pushed back by `settings.TASK_LEASE`, so if the worker dies the task is run again
+    by another one after that time. Returns None when there's nothing to run.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        #Skipping the locked rows, concurrent workers claim different tasks.
+        queryset = Task.objects.select_for_update(skip_locked=True).filter(failed_at__isnull=True, run_at__lte=now)
+        if pk is not None:
+            queryset = queryset.filter(pk=pk)
+        task = queryset.order_by('run_at', 'id').first()
+        if task is None:
+            return None
+        task.wait_time = (now - task.run_at).total_seconds()
+        task.attempts += 1
+        task.started_at = now
+        task.run_at = now + datetime.timedelta(seconds=settings.TASK_LEASE)
+        task.save(update_fields=['attempts', 'started_at', 'run_at'])
+    return task
+
+def run_task(task):
+    """
+    Runs a claimed `task`. It's deleted when it succeeds, otherwise retried later with an
+    exponential backoff, until it failed `max_attempts` times.
+    """
+    start = time.perf_counter()
+    try:
+        import_string(task.name)(*task.args)
+    except Exception:
+        logger.exception('Task %s failed, attempt %s of %s', task, task.attempts, task.max_attempts)
+        now = timezone.now()
+        if task.attempts < task.max_attempts:
+            delay = settings.TASK_RETRY_DELAY * 2 ** (task.attempts - 1)
+            Task.objects.filter(pk=task.pk).update(run_at=now + datetime.timedelta(seconds=delay),
+                started_at=None, last_error=traceback.format_exc())
+            result = 'retried'
+        else:
+            Task.objects.filter(pk=task.pk).update(failed_at=now, started_at=None, last_error=traceback.format_exc())
+            result = 'failed'
+    else:
+        Task.objects.filter(pk=task.pk).delete()
+        result = 'succeeded'
+    with _stats_lock:
+        _stats[result] += 1
+        _stats['wait_time'] += getattr(task, 'wait_time', 0.0)
+        _stats['run_time'] += time.perf_counter() - start
+    return result
+
+def run_pending(pk=None):
+    """
+    Claims and runs one task, see `claim`. Returns False when there was nothing to run.
+    """
+    task = claim(pk)
+    if task is None:
+        return False
+    run_task(task)
+    return True
+
+def work(stop, poll_interval=None, once=False):
+    """
+    Runs the due tasks until the `stop` event is set, waiting `poll_interval` seconds when
+    the queue is empty. With `once`, returns when the queue is empty instead. The database
+    errors are logged, and the polling waits longer after each one.
+    """
+    poll_interval = settings.TASK_POLL_INTERVAL if poll_interval is None else poll_interval
+    errors = 0
+    while not stop.is_set():
+        try:
+            ran = run_pending()
+        except DatabaseError:
+            errors += 1
+            logger.exception('Polling the task queue failed')
+            #A broken connection is closed, the next query opens a new one.
+            close_old_connections()
+            stop.wait(min(max(poll_interval, 1) * 2 ** (errors - 1), MAX_ERROR_BACKOFF))
+            continue
+        errors = 0
+        if not ran and (once or stop.wait(poll_interval)):
+            break
+
+def retry_failed():
+    """
+    Queues the failed tasks again, with their attempts reset. Returns their number.
+    """
+    return Task.objects.filter(failed_at__isnull=False).update(failed_at=None, attempts=0, run_at=timezone.now())
+
+def get_worker_stats():
+    """
+    Returns the counts and times of the tasks run by this process. `wait_time` is the time
+    between the tasks were due and started, `run_time` the time they ran, in seconds.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    done = stats['succeeded'] + stats['retried'] + stats['failed']
+    stats['avg_wait_time'] = stats['wait_time'] / done if done else 0.0
+    stats['avg_run_time'] = stats['run_time'] / done if done else 0.0
+    return stats
+
+def get_queue_stats():
+    """
+    Returns the depth of the queue: the numbers of due, running, scheduled and failed tasks,
+    the due ones by name, and the latency, the seconds the oldest due task has waited.
+    """
+    now = timezone.now()
+    pending = Q(failed_at__isnull=True)
+    due = pending & Q(run_at__lte=now)
+    running = pending & Q(run_at__gt=now, started_at__isnull=False)
+    stats = Task.objects.aggregate(
+        due=Count('pk', filter=due),
+        running=Count('pk', filter=running),
+        scheduled=Count('pk', filter=pending & Q(run_at__gt=now, started_at__isnull=True)),
+        failed=Count('pk', filter=Q(failed_at__isnull=False)),
+        oldest=Min('run_at', filter=due),
+    )
+    oldest = stats.pop('oldest')
+    stats['latency'] = (now - oldest).total_seconds() if oldest is not None else 0.0
+    stats['due_by_name'] = dict(Task.objects.filter(due).order_by().values_list('name').annotate(count=Count('pk')))
+    return stats
@@ -1,5 +1,7 @@
 from django import template
 
+from portfolio.images import get_srcset
+
 register = template.Library()
 
 @register.simple_tag(takes_context=True)
@@ -28,4 +30,13 @@ def param_replace(context, **kwargs):
         d[k] = v
     for k in [k for k, v in d.items() if not v]:
         del d[k]
-    return d.urlencode()
\ No newline at end of file
+    return d.urlencode()
+
+@register.filter
+def srcset(variants, extension):
+    """
+    Return the ``srcset`` attribute value of the ``extension`` resized variants of an image.
+
+    For example ``{{ portfoller.profile_picture_variants|srcset:'webp' }}``.
+    """
+    return get_srcset(variants, extension)
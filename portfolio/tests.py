@@ -1,24 +1,67 @@
 import os
+import base64
+import datetime
 import json
 import mock
+import asyncio
+import threading
+import gzip
+import shutil
+import tempfile
+from io import StringIO, BytesIO
+from unittest import skipIf
+import psycopg2
 from dateutil.relativedelta import relativedelta
 
 from django.conf import settings
 from django.core.exceptions import ValidationError, PermissionDenied
+from django.http import Http404, HttpResponse
 from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.storage import default_storage
+from django.contrib.staticfiles.storage import staticfiles_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.forms.models import model_to_dict
-from django.urls import reverse
-from django.test import TestCase, tag
+from django.urls import reverse, get_resolver
+from django.db import connection, OperationalError
+from django.test import TestCase, TransactionTestCase, RequestFactory, AsyncRequestFactory, tag, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from django.contrib.auth.models import AnonymousUser
 
 from rest_framework.test import APITestCase, APIRequestFactory
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
 
 from .models import *
 from .views import *
+from .facets import get_facets, rebuild_facets
+from .images import IMAGE_VARIANT_WIDTHS, update_variants, get_variant_name
+from .pagecache import get_stats, get_page_key
+from .warmup import warm_up
+from .media import MediaView
+from .purge import purge_deleted, purge_images
+from .tasks import enqueue, claim, run_task, work, get_queue_stats
+from .renderers import FastJSONRenderer, FastJSONParser, orjson
+from .staticfiles import StaticFilesMiddleware
+from .compression import CompressionMiddleware
+from . import background
+from .db.pool import ConnectionPool
 
 
 #Testing Functions
+
+def record_task(value):
+    """
+    Task saving `value` in the cache, to check it ran.
+    """
+    cache.set('test_task', value)
+
+def failing_task():
+    raise ValueError('failed')
+
 def create_portfoller(username, first_name=None, last_name=None, email=None, password='testpassword', gender='Male', birthdate='2000-01-01', country_of_birth='BR', career='Developer', biography=None):
     """
     Create a portfoller with the given `username`, and gives it
@@ -83,6 +126,63 @@ class PortfollerModelTests(TestCase):
         self.assertEqual(portfoller_2.get_age(), portfoller_2_age)
         self.assertEqual(portfoller_3.get_age(), portfoller_3_age)
 
+    def test_fullname(self):
+        """
+        The stored `fullname` follows changes of `first_name` and `last_name`.
+        """
+        portfoller = create_portfoller('test1')
+        self.assertEqual(portfoller.fullname, 'test1 test1')
+        portfoller.first_name = 'John'
+        portfoller.last_name = 'Smith'
+        portfoller.save(update_fields=['first_name', 'last_name'])
+        self.assertEqual(Portfoller.objects.get(pk=portfoller.pk).fullname, 'john smith')
+
+class PortfollerFacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get_counts(self, field):
+        return {facet.value: facet.count for facet in get_facets()[field]}
+
+    def test_facets_follow_changes(self):
+        """
+        Facet counts are updated when portfollers are created, changed and deleted.
+        """
+        portfoller_1 = create_portfoller('test1', country_of_birth='US', career='Artist')
+        create_portfoller('test2')
+        self.assertEqual(self.get_counts('country_of_birth'), {'US': 1, 'BR': 1})
+        self.assertEqual(self.get_counts('career'), {'Developer': 1, 'Artist': 1, 'Writer': 0})
+        portfoller_1 = Portfoller.objects.get(pk=portfoller_1.pk)
+        portfoller_1.country_of_birth = 'BR'
+        portfoller_1.save()
+        self.assertEqual(self.get_counts('country_of_birth'), {'BR': 2})
+        portfoller_1.delete()
+        self.assertEqual(self.get_counts('country_of_birth'), {'BR': 1})
+        self.assertEqual(self.get_counts('career'), {'Developer': 1, 'Artist': 0, 'Writer': 0})
+
+    def test_rebuild_facets(self):
+        """
+        `rebuild_facets` recomputes the counts from the portfollers table.
+        """
+        create_multi_portfoller(3)
+        PortfollerFacet.objects.all().delete()
+        rebuild_facets()
+        self.assertEqual(self.get_counts('country_of_birth'), {'BR': 3})
+
+    def test_facets_api(self):
+        """
+        The facets endpoint lists the facets with labels and counts.
+        """
+        create_portfoller('test1', country_of_birth='US')
+        response = self.client.get('/api/facets/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['country_of_birth'], [{'value': 'US', 'label': 'United States of America', 'count': 1}])
+        self.assertEqual(response.data['career'], [
+            {'value': 'Developer', 'label': 'Developer', 'count': 1},
+            {'value': 'Artist', 'label': 'Artist', 'count': 0},
+            {'value': 'Writer', 'label': 'Writer', 'count': 0},
+        ])
+
 
 #Views
 class PortfollerListViewTests(TestCase):
@@ -118,6 +218,42 @@ class PortfollerListViewTests(TestCase):
         self.assertNotContains(response, "No Portfollers are available.")
         self.assertTemplateUsed('portfolio/index.html')
 
+    def test_keyset_pagination(self):
+        """
+        The list is paginated with cursors, following next and previous links goes through every portfoller once.
+        """
+        portfollers = create_multi_portfoller(20)
+        expected = [str(portfoller) for portfoller in sorted(portfollers, key=lambda portfoller: portfoller.fullname)]
+        response = self.client.get(reverse('portfolio:home'))
+        page_obj = response.context['page_obj']
+        self.assertEqual([str(portfoller) for portfoller in page_obj], expected[:15])
+        self.assertFalse(page_obj.has_previous())
+        response = self.client.get(reverse('portfolio:home') + '?cursor=' + page_obj.next_cursor)
+        page_obj = response.context['page_obj']
+        self.assertEqual([str(portfoller) for portfoller in page_obj], expected[15:])
+        self.assertFalse(page_obj.has_next())
+        self.assertContains(response, 'About 20 portfollers')
+        response = self.client.get(reverse('portfolio:home') + '?cursor=' + page_obj.previous_cursor)
+        self.assertEqual([str(portfoller) for portfoller in response.context['page_obj']], expected[:15])
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_invalid_cursor(self):
+        """
+        An invalid cursor returns a 404 error.
+        """
+        response = self.client.get(reverse('portfolio:home') + '?cursor=invalid')
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_wrong_values(self):
+        """
+        A well formed cursor with values of the wrong types returns a 404 error.
+        """
+        cursor = base64.urlsafe_b64encode(b'{"v":["a","x"],"r":0}').decode().rstrip('=')
+        response = self.client.get(reverse('portfolio:home') + '?cursor=' + cursor)
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get('/api/portfollers/?cursor=' + cursor)
+        self.assertEqual(response.status_code, 404)
+
     def test_countries_context_data(self):
         """
         Countries context data gives uniques countries objects.
@@ -127,11 +263,12 @@ class PortfollerListViewTests(TestCase):
         portfoller3 = create_portfoller('test3')
         countries = [portfoller1.country_of_birth, portfoller2.country_of_birth]
         response = self.client.get(reverse('portfolio:home'))
-        portfollers = response.context['countries']
+        facets = response.context['countries']
         context_countries = []
-        for portfoller in portfollers:
-            context_countries.append(portfoller.country_of_birth)
+        for facet in facets:
+            context_countries.append(facet.value)
         self.assertCountEqual(countries, context_countries)
+        self.assertEqual({facet.value: facet.count for facet in facets}, {'US': 1, 'BR': 2})
 
     def text_filter_context_data(self):
         """
@@ -148,6 +285,18 @@ class PortfollerListViewTests(TestCase):
         self.assertEqual(filter_career_get, filter_career)
         self.assertEqual(filter_country_get, filter_country)
 
+    def test_name_filter(self):
+        """
+        The name filter matches substrings of the full name and tolerates typos, best matches first.
+        """
+        create_portfoller('johnathan')
+        create_portfoller('jonathan')
+        create_portfoller('mary')
+        response = self.client.get(reverse('portfolio:home') + '?filter=Jonathan')
+        self.assertQuerysetEqual(response.context['portfoller_list'], ['<Portfoller: jonathan jonathan>', '<Portfoller: johnathan johnathan>'])
+        response = self.client.get(reverse('portfolio:home') + '?filter=ary')
+        self.assertQuerysetEqual(response.context['portfoller_list'], ['<Portfoller: mary mary>'])
+
 class ProfileViewTests(TestCase):
     def test_context_data(self):
         """
@@ -233,6 +382,768 @@ class ProjectViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertQuerysetEqual(project_images, response_images, transform=lambda x: x)
 
+    def test_queries(self):
+        """
+        The project and its owner are loaded in one query, the images in another one.
+        """
+        cache.clear()
+        portfoller = create_portfoller('Test')
+        project = create_project(portfoller, 'test_project', 'test_project_description')
+        create_project_image(project)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('portfolio:project', kwargs={'username': portfoller.username, 'project_name': project.project_name}))
+        self.assertEqual(response.status_code, 200)
+
+    def test_project_not_found(self):
+        """
+        A project of another portfoller isn't found.
+        """
+        portfoller = create_portfoller('Test')
+        portfoller2 = create_portfoller('Test2')
+        project = create_project(portfoller, 'test_project', 'test_project_description')
+        response = self.client.get(reverse('portfolio:project', kwargs={'username': portfoller2.username, 'project_name': project.project_name}))
+        self.assertEqual(response.status_code, 404)
+
+@override_settings(PAGE_CACHE_STATS_RATE=1)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get_profile(self, portfoller):
+        return self.client.get(reverse('portfolio:profile', kwargs={'username': portfoller.username}))
+
+    def get_project(self, project):
+        return self.client.get(reverse('portfolio:project', kwargs={'username': project.user.username, 'project_name': project.project_name}))
+
+    def test_cached_page(self):
+        """
+        The second anonymous visit of a page doesn't query the database.
+        """
+        portfoller = create_portfoller('Test')
+        project = create_project(portfoller, 'test_project', 'test_project_description')
+        first = self.get_project(project)
+        with self.assertNumQueries(0):
+            second = self.get_project(project)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(get_stats()['project'], {'hits': 1, 'misses': 1, 'ratio': 0.5})
+
+    def test_owner_variant(self):
+        """
+        The owner and the visitors get their own versions of a page, pages seen by other
+        portfollers aren't cached.
+        """
+        portfoller = create_portfoller('Test')
+        create_portfoller('Test2')
+        project = create_project(portfoller, 'test_project', 'test_project_description')
+        self.assertContains(self.get_project(project), 'Sign in')
+        self.client.login(username='Test', password='testpassword')
+        self.assertContains(self.get_project(project), 'Logged as Test<')
+        self.client.login(username='Test2', password='testpassword')
+        self.assertContains(self.get_project(project), 'Logged as Test2<')
+        self.assertEqual(get_stats()['project'], {'hits': 0, 'misses': 2, 'ratio': 0.0})
+
+    def test_invalidation(self):
+        """
+        The cached pages are invalidated when the portfoller, its projects or their images change.
+        """
+        portfoller = create_portfoller('Test')
+        project = create_project(portfoller, 'test_project', 'test_project_description')
+        profile_key = get_page_key('anonymous', 'Test')
+        cache.set(profile_key, (b'', 'text/html'))
+        portfoller.biography = 'New biography'
+        portfoller.save()
+        self.assertIsNone(cache.get(profile_key))
+        self.get_project(project)
+        project.project_description = 'New description'
+        project.save()
+        self.assertContains(self.get_project(project), 'New description')
+        image = create_project_image(project)
+        self.assertContains(self.get_project(project), image.image.url)
+        image.delete()
+        self.assertNotContains(self.get_project(project), image.image.url)
+        cache.set(profile_key, (b'', 'text/html'))
+        create_project(portfoller, 'other_project', None)
+        self.assertIsNone(cache.get(profile_key))
+        cache.set(profile_key, (b'', 'text/html'))
+        project.delete()
+        self.assertIsNone(cache.get(profile_key))
+        self.assertEqual(self.client.get(reverse('portfolio:project', kwargs={'username': 'Test', 'project_name': 'test_project'})).status_code, 404)
+
+    def test_renamed_project(self):
+        """
+        The page of a renamed project isn't served under the previous name.
+        """
+        portfoller = create_portfoller('Test')
+        create_project(portfoller, 'test_project', 'test_project_description')
+        project = Project.objects.get(project_name='test_project')
+        old_url = reverse('portfolio:project', kwargs={'username': 'Test', 'project_name': 'test_project'})
+        self.assertEqual(self.client.get(old_url).status_code, 200)
+        project.project_name = 'renamed_project'
+        project.save()
+        self.assertEqual(self.client.get(old_url).status_code, 404)
+
+@override_settings(ASYNC_VIEWS=True)
+class AsyncViewsTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        portfoller = create_portfoller('Test')
+        create_project(portfoller, 'test_project', 'test_project_description')
+
+    def tearDown(self):
+        #The images variants tasks started by the commits hold a connection to the test database.
+        background.get_executor().shutdown(wait=True)
+        background._executor = None
+
+    def get_request(self, path):
+        request = AsyncRequestFactory().get(path)
+        request.user = AnonymousUser()
+        return request
+
+    async def test_project_view(self):
+        """
+        The project page is served by a coroutine, the database work runs in the thread pool.
+        """
+        view = ProjectView.as_view()
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        response = await view(self.get_request('/users/Test/test_project/'), username='Test', project_name='test_project')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'test_project_description')
+
+    async def test_api_list(self):
+        """
+        The API lists are served by a coroutine.
+        """
+        view = ProjectViewSet.as_view({'get': 'list'})
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        response = await view(self.get_request('/api/portfollers/Test/projects/'), username='Test')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['results'][0]['project_name'], 'test_project')
+
+@override_settings(STATIC_ROOT=os.path.join(tempfile.gettempdir(), 'portfolio-static-tests'))
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0, clear=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.STATIC_ROOT)
+        super().tearDownClass()
+
+    def test_hashed_and_compressed(self):
+        """
+        The collected files get a hashed name, and the compressible ones a gzip copy.
+        """
+        url = staticfiles_storage.url('dynamic_formsets/jquery.formset.js')
+        self.assertRegex(url, r'^/static/dynamic_formsets/jquery\.formset\.[0-9a-f]{12}\.js$')
+        self.assertTrue(os.path.isfile(os.path.join(settings.STATIC_ROOT, url[len('/static/'):] + '.gz')))
+        self.assertFalse(os.path.isfile(os.path.join(settings.STATIC_ROOT, staticfiles_storage.url('portfolio/add.png')[len('/static/'):] + '.gz')))
+
+    def test_serve_compressed(self):
+        """
+        A hashed file is served compressed to the clients accepting it, and cached for a year.
+        """
+        url = staticfiles_storage.url('dynamic_formsets/jquery.formset.js')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertIn(b'formset', gzip.decompress(b''.join(response.streaming_content)))
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_not_modified(self):
+        """
+        The clients having the file get a 304, the unhashed names are cached only for a while.
+        """
+        response = self.client.get('/static/portfolio/add.png')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        response = self.client.get('/static/portfolio/add.png', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get('/static/portfolio/missing.png').status_code, 404)
+
+    async def test_async(self):
+        """
+        Under ASGI the middleware is a coroutine, the other requests are passed to the next one.
+        """
+        async def get_response(request):
+            return HttpResponse('next')
+        middleware = StaticFilesMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        response = await middleware(AsyncRequestFactory().get(staticfiles_storage.url('portfolio/add.png')))
+        self.assertEqual(response['Content-Type'], 'image/png')
+        response = await middleware(AsyncRequestFactory().get('/users/'))
+        self.assertEqual(response.content, b'next')
+        self.assertFalse(asyncio.iscoroutinefunction(StaticFilesMiddleware(lambda request: None)))
+
+class MediaViewTests(TestCase):
+    url = '/media/test_media/test_image.png'
+
+    def setUp(self):
+        with open(os.path.join(settings.MEDIA_ROOT, 'test_media', 'test_image.png'), 'rb') as f:
+            self.content = f.read()
+
+    def test_serve(self):
+        """
+        The uploaded files are streamed, and a client having the file gets a 304.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        with self.assertRaises(Http404):
+            MediaView.as_view()(RequestFactory().get('/media/'), path='../settings.py')
+
+    def test_range(self):
+        """
+        Range requests get only the requested bytes, or a 416 when they're out of the file.
+        """
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/%d' % len(self.content))
+        self.assertEqual(b''.join(response.streaming_content), self.content[10:20])
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-5:])
+        response = self.client.get(self.url, HTTP_RANGE='bytes=%d-' % len(self.content))
+        self.assertEqual(response.status_code, 416)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"outdated"')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(MEDIA_OFFLOAD='x-accel-redirect')
+    def test_offload(self):
+        """
+        With an offload mode, the web server is told to send the file.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/test_media/test_image.png')
+        self.assertEqual(response.content, b'')
+
+@override_settings(MEDIA_ROOT=os.path.join(tempfile.gettempdir(), 'portfolio-media-tests'))
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfoller = create_portfoller('Test')
+        cls.project = create_project(cls.portfoller, 'test_project', 'test_project_description')
+
+    def tearDown(self):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+
+    def test_deduplicated(self):
+        """
+        Identical uploads are stored once, under the hash of their content, and counted.
+        """
+        image1 = create_project_image(self.project)
+        image2 = create_project_image(self.project)
+        self.assertEqual(image1.image.name, image2.image.name)
+        self.assertRegex(image1.image.name, r'^cas/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        self.assertEqual(Blob.objects.get(name=image1.image.name).refcount, 2)
+        image1.delete()
+        self.assertEqual(Blob.objects.get(name=image2.image.name).refcount, 1)
+
+    def test_collect_garbage(self):
+        """
+        The files without references are deleted with their variants, the others are kept.
+        """
+        image = create_project_image(self.project)
+        name = image.image.name
+        variant_name = get_variant_name(name, 'small', 'webp')
+        self.assertEqual(default_storage.save(variant_name, ContentFile(b'variant')), variant_name)
+        call_command('gc_media', grace=0, stdout=StringIO())
+        self.assertTrue(default_storage.exists(name))
+        image.delete()
+        call_command('gc_media', grace=0, stdout=StringIO())
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(variant_name))
+        self.assertFalse(Blob.objects.filter(name=name).exists())
+
+    def test_scan(self):
+        """
+        The stored files never referenced are found by the scan.
+        """
+        image = create_project_image(self.project)
+        orphan = default_storage.save('orphan.txt', ContentFile(b'orphan'))
+        call_command('gc_media', grace=0, stdout=StringIO())
+        self.assertTrue(default_storage.exists(orphan))
+        call_command('gc_media', grace=0, scan=True, stdout=StringIO())
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertTrue(default_storage.exists(image.image.name))
+
+@override_settings(MEDIA_ROOT=os.path.join(tempfile.gettempdir(), 'portfolio-media-tests'), PURGE_MEDIA_GRACE=0)
+class PurgeTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.portfoller = create_portfoller('test1')
+        self.project = create_project(self.portfoller, 'project1', 'test description')
+        self.image = create_project_image(self.project)
+        self.client.post('/api/login/', {'username': 'test1', 'password': 'testpassword'})
+
+    def tearDown(self):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+
+    def test_project_deleted(self):
+        """
+        A deleted project is hidden and its name freed at once, its rows and files are
+        removed by the purge.
+        """
+        response = self.client.delete('/api/portfollers/test1/projects/project1/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        self.assertEqual(Project.all_objects.get(pk=self.project.pk).project_name, 'deleted:%s' % self.project.pk)
+        self.assertTrue(ProjectImages.objects.filter(pk=self.image.pk).exists())
+        create_project(self.portfoller, 'project1', 'test description')
+        purged = purge_deleted()
+        self.assertEqual(purged, {'images': 1, 'projects': 1, 'portfollers': 0, 'files': 1})
+        self.assertFalse(Project.all_objects.filter(pk=self.project.pk).exists())
+        self.assertFalse(ProjectImages.objects.filter(pk=self.image.pk).exists())
+        self.assertFalse(default_storage.exists(self.image.image.name))
+        self.assertFalse(Blob.objects.filter(name=self.image.image.name).exists())
+
+    def test_portfoller_deleted(self):
+        """
+        A deleted portfoller can't sign in, leaves the facets and frees its username, its
+        projects are purged with it.
+        """
+        response = self.client.delete('/api/portfollers/test1/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Portfoller.objects.filter(pk=self.portfoller.pk).exists())
+        self.assertEqual(PortfollerFacet.objects.get(field='career', value='Developer').count, 0)
+        self.assertFalse(self.client.login(username='test1', password='testpassword'))
+        create_portfoller('test1')
+        self.assertEqual(purge_deleted(), {'images': 1, 'projects': 1, 'portfollers': 1, 'files': 1})
+        self.assertFalse(Portfoller.all_objects.filter(pk=self.portfoller.pk).exists())
+        self.assertEqual(PortfollerFacet.objects.get(field='career', value='Developer').count, 1)
+
+    def test_resumed(self):
+        """
+        An interrupted purge is finished by the next one, the progress is reported by batch.
+        """
+        image = create_project_image(self.project)
+        self.client.delete('/api/portfollers/test1/projects/project1/')
+        self.assertEqual(len(purge_images(1)), 1)
+        reports = []
+        purged = purge_deleted(batch_size=1, report=lambda purged, pending: reports.append(pending))
+        self.assertEqual(purged['images'], 1)
+        self.assertEqual(purged['projects'], 1)
+        self.assertEqual(reports[-1], {'images': 0, 'projects': 0, 'portfollers': 0})
+        self.assertFalse(default_storage.exists(image.image.name))
+
+class WarmUpTests(TestCase):
+    def test_warm_up(self):
+        """
+        The warm up loads the URL resolvers and templates without querying the database.
+        """
+        with self.assertNumQueries(0):
+            duration = warm_up()
+        self.assertGreater(duration, 0)
+        resolver = get_resolver()
+        self.assertTrue(resolver._populated)
+        self.assertTrue(resolver.namespace_dict['portfolio'][1]._populated)
+
+class DatabasePoolTests(TestCase):
+    def get_pool(self, **options):
+        pool = ConnectionPool(**options)
+        self.addCleanup(pool.close)
+        return pool
+
+    def connect(self):
+        return psycopg2.connect(**connection.get_connection_params())
+
+    def test_reuse(self):
+        """
+        A given back connection is reused, after its transaction is rolled back.
+        """
+        pool = self.get_pool()
+        conn = pool.get(self.connect)
+        conn.cursor().execute('SELECT 1')
+        pool.put(conn)
+        self.assertIs(pool.get(self.connect), conn)
+        self.assertEqual(conn.get_transaction_status(), psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+        stats = pool.get_stats()
+        self.assertEqual((stats['created'], stats['reused'], stats['in_use']), (1, 1, 1))
+        pool.put(conn)
+
+    def test_health_check(self):
+        """
+        An idle connection closed by the server is replaced by a new one.
+        """
+        pool = self.get_pool(check_after=0)
+        conn = pool.get(self.connect)
+        pool.put(conn)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [conn.get_backend_pid()])
+        new_conn = pool.get(self.connect)
+        self.assertIsNot(new_conn, conn)
+        stats = pool.get_stats()
+        self.assertEqual((stats['failed_health_checks'], stats['discarded'], stats['size']), (1, 1, 1))
+        pool.put(new_conn)
+
+    def test_health_check_unlocked(self):
+        """
+        The health check runs without holding the pool lock, other threads can give back connections meanwhile.
+        """
+        pool = self.get_pool(check_after=0)
+        conn = pool.get(self.connect)
+        other = pool.get(self.connect)
+        pool.put(conn)
+        given_back = threading.Event()
+
+        def is_healthy(connection):
+            thread = threading.Thread(target=lambda: (pool.put(other), given_back.set()))
+            thread.start()
+            thread.join(1)
+            return True
+
+        with mock.patch.object(pool, 'is_healthy', is_healthy):
+            self.assertIs(pool.get(self.connect), conn)
+        self.assertTrue(given_back.is_set())
+        pool.put(conn)
+
+    def test_saturation(self):
+        """
+        When all the connections are in use, a checkout waits for one and fails after the timeout.
+        """
+        pool = self.get_pool(max_size=1, timeout=0.05)
+        conn = pool.get(self.connect)
+        self.assertEqual(pool.get_stats()['saturation'], 1)
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.get(self.connect)
+        self.assertEqual(pool.get_stats()['timeouts'], 1)
+        pool.put(conn)
+
+    def test_stats_view(self):
+        """
+        Only the staff gets the pools statistics.
+        """
+        url = reverse('portfolio:api-db-pool')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        portfoller = create_portfoller('Test')
+        portfoller.is_staff = True
+        portfoller.save()
+        self.client.force_login(portfoller)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['pid'], os.getpid())
+        self.assertIn(settings.DATABASES['default']['NAME'], response.json()['pools'])
+
+@override_settings(TASK_RETRY_DELAY=60)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_run_task(self):
+        """
+        A due task is claimed once, run and removed from the queue.
+        """
+        task = enqueue(record_task, 'done')
+        claimed = claim()
+        self.assertEqual(claimed.pk, task.pk)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(claim())
+        self.assertEqual(run_task(claimed), 'succeeded')
+        self.assertEqual(cache.get('test_task'), 'done')
+        self.assertFalse(Task.objects.exists())
+
+    def test_scheduled(self):
+        """
+        A task isn't run before its time.
+        """
+        enqueue(record_task, 'done', run_at=timezone.now() + datetime.timedelta(minutes=5))
+        self.assertIsNone(claim())
+        self.assertEqual(get_queue_stats()['scheduled'], 1)
+
+    def test_retries(self):
+        """
+        A failing task is retried later with a growing delay, until its last attempt.
+        """
+        task = enqueue(failing_task, max_attempts=2)
+        self.assertEqual(run_task(claim()), 'retried')
+        task.refresh_from_db()
+        self.assertIn('ValueError', task.last_error)
+        self.assertGreater(task.run_at, timezone.now() + datetime.timedelta(seconds=50))
+        Task.objects.filter(pk=task.pk).update(run_at=timezone.now())
+        self.assertEqual(run_task(claim()), 'failed')
+        task.refresh_from_db()
+        self.assertIsNotNone(task.failed_at)
+        self.assertIsNone(claim())
+        call_command('run_tasks', retry_failed=True, once=True, threads=1, stdout=StringIO())
+        task.refresh_from_db()
+        self.assertEqual(task.attempts, 1)
+        self.assertIsNone(task.failed_at)
+
+    def test_worker_command(self):
+        """
+        The worker runs the due tasks, the staff gets the queue depth and latency.
+        """
+        url = reverse('portfolio:api-tasks')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        portfoller = create_portfoller('Test')
+        portfoller.is_staff = True
+        portfoller.save()
+        self.client.force_login(portfoller)
+        Task.objects.all().delete()
+        enqueue(record_task, 'done')
+        enqueue(failing_task, run_at=timezone.now() - datetime.timedelta(seconds=30))
+        queue = self.client.get(url).json()['queue']
+        self.assertEqual(queue['due'], 2)
+        self.assertGreaterEqual(queue['latency'], 30)
+        out = StringIO()
+        call_command('run_tasks', once=True, threads=1, stdout=out)
+        self.assertIn('1 succeeded, 1 retried', out.getvalue())
+        self.assertEqual(cache.get('test_task'), 'done')
+        self.assertEqual(get_queue_stats()['due'], 0)
+
+    def test_worker_database_error(self):
+        """
+        A database error is logged, the worker closes the broken connection and polls again later.
+        """
+        stop = mock.Mock()
+        stop.is_set.return_value = False
+        stop.wait.return_value = False
+        with mock.patch('portfolio.tasks.run_pending', side_effect=[OperationalError('down'), OperationalError('down'), True, False]) as run_pending, \
+                mock.patch('portfolio.tasks.close_old_connections') as close_old_connections, \
+                self.assertLogs('portfolio.tasks', 'ERROR'):
+            work(stop, poll_interval=0.5, once=True)
+        self.assertEqual(run_pending.call_count, 4)
+        self.assertEqual(close_old_connections.call_count, 2)
+        self.assertEqual(stop.wait.call_args_list, [mock.call(1), mock.call(2)])
+
+class JSONRenderingTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_multi_portfoller(5)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_same_output(self):
+        """
+        The fast renderer output is the one of the DRF renderer, and is parsed back.
+        """
+        data = {'text': 'line\u2028separator é', 'number': 1.5, 'date': timezone.now(), 'list': [None, True]}
+        content = FastJSONRenderer().render(data)
+        self.assertEqual(content, JSONRenderer().render(data))
+        parsed = FastJSONParser().parse(BytesIO(content))
+        self.assertEqual(parsed['text'], data['text'])
+
+    @skipIf(orjson is None, 'orjson is not installed')
+    def test_floats(self):
+        """
+        The floats are parsed to the same values as the DRF renderer ones, the non finite ones
+        the DRF renderer refuses are rendered as null.
+        """
+        data = {'big': 1e16, 'small': 1.5e-7}
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+        self.assertEqual(json.loads(FastJSONRenderer().render({'nan': float('nan'), 'inf': float('inf')})), {'nan': None, 'inf': None})
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({'nan': float('nan')})
+        with self.assertRaises(exceptions.ParseError):
+            FastJSONParser().parse(BytesIO(b'{"text": '))
+
+    @override_settings(COMPRESS_MIN_SIZE=200)
+    def test_compression(self):
+        """
+        The API responses are compressed with the encoding the client accepts, from a size.
+        """
+        response = self.client.get('/api/portfollers/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['results']), 5)
+        response = self.client.get('/api/portfollers/')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(len(response.json()['results']), 5)
+        response = self.client.get('/api/portfollers/test1/projects/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(COMPRESS_MIN_SIZE=200)
+    async def test_compression_async(self):
+        """
+        Under ASGI the compression middleware is a coroutine awaiting the response.
+        """
+        content = json.dumps({'results': ['portfoller'] * 100})
+        async def get_response(request):
+            return HttpResponse(content, content_type='application/json')
+        middleware = CompressionMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        request = AsyncRequestFactory().get('/api/portfollers/')
+        request.META['HTTP_ACCEPT_ENCODING'] = 'gzip'
+        response = await middleware(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content).decode(), content)
+
+class SparseFieldsetsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        portfoller = create_portfoller('test1')
+        create_project(portfoller, 'project1', 'test description')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fields(self):
+        """
+        Only the requested fields are sent, and only their columns and relations are loaded.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/portfollers/?fields=username,first_name,last_name,profile_picture')
+        self.assertEqual(list(response.json()['results'][0]), ['username', 'first_name', 'last_name', 'profile_picture'])
+        sql = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('"biography"', sql)
+        self.assertNotIn('"portfolio_project"', sql)
+        response = self.client.get('/api/portfollers/test1/projects/?fields=project_name')
+        self.assertEqual(response.json()['results'], [{'project_name': 'project1'}])
+
+    def test_exclude(self):
+        """
+        The excluded fields are left out, unknown fields are rejected.
+        """
+        response = self.client.get('/api/portfollers/test1/?exclude=projects,biography')
+        self.assertNotIn('projects', response.json())
+        self.assertNotIn('biography', response.json())
+        self.assertIn('email', response.json())
+        response = self.client.get('/api/portfollers/?fields=username,password')
+        self.assertEqual(response.status_code, 400)
+
+class ExpandTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.portfoller = create_portfoller('test1')
+        for name in ('project2', 'project1'):
+            project = create_project(self.portfoller, name, 'test description')
+            ProjectImages.objects.create(project=project, image='generic_user.png')
+
+    def get_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_expand_projects_images(self):
+        """
+        The projects and their images are nested in the portfoller, with a number of queries
+        independent of their number.
+        """
+        response, queries = self.get_queries('/api/portfollers/test1/?expand=projects.images')
+        projects = response.json()['projects']
+        self.assertEqual([project['project_name'] for project in projects], ['project1', 'project2'])
+        self.assertEqual(len(projects[0]['images']), 1)
+        project = Project.objects.get(project_name='project1')
+        ProjectImages.objects.create(project=project, image='generic_user.png')
+        create_project(self.portfoller, 'project3', 'test description')
+        response, more_queries = self.get_queries('/api/portfollers/test1/?expand=projects.images')
+        self.assertEqual(len(response.json()['projects']), 3)
+        self.assertEqual(len(response.json()['projects'][0]['images']), 2)
+        self.assertEqual(more_queries, queries)
+        response, queries = self.get_queries('/api/portfollers/?expand=projects')
+        self.assertNotIn('images', response.json()['results'][0]['projects'][0])
+
+    def test_etag_follows_images(self):
+        """
+        An expanded response changes with the images of the projects.
+        """
+        response = self.client.get('/api/portfollers/test1/?expand=projects.images')
+        ProjectImages.objects.create(project=Project.objects.get(project_name='project1'), image='generic_user.png')
+        response = self.client.get('/api/portfollers/test1/?expand=projects.images', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_projects_list_etag_follows_images(self):
+        """
+        An expanded projects list changes with the images of the projects.
+        """
+        url = '/api/portfollers/test1/projects/?expand=images'
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        ProjectImages.objects.create(project=Project.objects.get(project_name='project1'), image='generic_user.png')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results'][0]['images']), 2)
+        response = self.client.get('/api/portfollers/test1/?expand=unknown')
+        self.assertEqual(response.status_code, 400)
+
+class PortfollerFiltersAPITests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        create_portfoller('anna', career='Developer', country_of_birth='BR')
+        create_portfoller('bruno', career='Designer', country_of_birth='BR')
+        create_portfoller('carla', career='Developer', country_of_birth='US')
+
+    def get_usernames(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [portfoller['username'] for portfoller in response.json()['results']]
+
+    def test_filters_like_the_list_page(self):
+        """
+        The API filters by career and country of birth, 'All' matching any, like the list page.
+        """
+        self.assertEqual(self.get_usernames('/api/portfollers/?career=Developer'), ['anna', 'carla'])
+        self.assertEqual(self.get_usernames('/api/portfollers/?career=Developer&country=BR'), ['anna'])
+        self.assertEqual(self.get_usernames('/api/portfollers/?career=All&country=BR&search=bruno'), ['bruno'])
+        response = self.client.get(reverse('portfolio:home') + '?filter_career=Developer&filter_country=BR')
+        self.assertEqual([portfoller.username for portfoller in response.context['portfoller_list']], ['anna'])
+
+    def test_ordering(self):
+        """
+        The list is ordered by `ordering`, through the pages, and an unknown one is rejected.
+        """
+        self.assertEqual(self.get_usernames('/api/portfollers/?ordering=-fullname'), ['carla', 'bruno', 'anna'])
+        self.assertEqual(self.get_usernames('/api/portfollers/?ordering=-date_joined&career=Developer'), ['carla', 'anna'])
+        with mock.patch.object(CachedKeysetPagination, 'page_size', 2):
+            response = self.client.get('/api/portfollers/?ordering=-fullname')
+            response = self.client.get(response.json()['next'])
+        self.assertEqual([portfoller['username'] for portfoller in response.json()['results']], ['anna'])
+        response = self.client.get('/api/portfollers/?ordering=password')
+        self.assertEqual(response.status_code, 400)
+
+    def test_ordering_same_millisecond(self):
+        """
+        Walking the pages by join date lists each portfoller once, even when they joined in
+        the same millisecond.
+        """
+        create_portfoller('dora')
+        create_portfoller('emma')
+        date_joined = timezone.now().replace(microsecond=500000)
+        for microseconds, username in enumerate(['emma', 'carla', 'anna', 'dora', 'bruno']):
+            Portfoller.objects.filter(username=username).update(date_joined=date_joined + datetime.timedelta(microseconds=microseconds))
+        for ordering, usernames in (('date_joined', ['emma', 'carla', 'anna', 'dora', 'bruno']),
+                ('-date_joined', ['bruno', 'dora', 'anna', 'carla', 'emma'])):
+            url, walked = '/api/portfollers/?ordering=' + ordering, []
+            with mock.patch.object(CachedKeysetPagination, 'page_size', 2):
+                while url and len(walked) < 10:
+                    response = self.client.get(url).json()
+                    walked += [portfoller['username'] for portfoller in response['results']]
+                    url = response['next']
+            self.assertEqual(walked, usernames)
+
+    def test_results_cache(self):
+        """
+        The same filters are served from the ids cached by the first request, until they expire.
+        """
+        url = '/api/portfollers/?career=Developer&ordering=fullname'
+        self.assertEqual(self.get_usernames(url), ['anna', 'carla'])
+        create_portfoller('dora', career='Developer')
+        self.assertEqual(self.get_usernames('/api/portfollers/?ordering=fullname&career=Developer&fields=username'), ['anna', 'carla'])
+        self.assertEqual(self.get_usernames('/api/portfollers/?career=Developer'), ['anna', 'carla', 'dora'])
+        cache.clear()
+        self.assertEqual(self.get_usernames(url), ['anna', 'carla', 'dora'])
+
+    def test_etag_not_cached(self):
+        """
+        A cached page still answers 200 to a stale `If-None-Match` once a listed portfoller changed.
+        """
+        url = '/api/portfollers/?career=Developer'
+        response = self.client.get(url)
+        portfoller = Portfoller.objects.get(username='anna')
+        portfoller.first_name = 'Ana'
+        portfoller.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['first_name'], 'Ana')
+
 class AddProjectViewTests(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -290,6 +1201,51 @@ class AddProjectViewTests(TestCase):
             'projectimages_set-INITIAL_FORMS': 0, 'projectimages_set-MIN_NUM_FORMS': 0, 'projectimages_set-MAX_NUM_FORMS': 30})
         self.assertEqual(Project.objects.filter(user=self.portfoller).count(), 1)
 
+    def test_project_created_with_images(self):
+        """
+        The images of the formset are saved with the project.
+        """
+        response = self.client.post('/signin/', {'username': 'Test', 'password': 'testpassword'})
+        with open(os.getcwd() + '/portfoling/media/test_media/test_image.png', 'rb') as f:
+            content = f.read()
+        data = {'project_name': 'test_project', 'project_description': 'This is a test project.', 'projectimages_set-TOTAL_FORMS': 3,
+            'projectimages_set-INITIAL_FORMS': 0, 'projectimages_set-MIN_NUM_FORMS': 0, 'projectimages_set-MAX_NUM_FORMS': 30}
+        for x in range(3):
+            data['projectimages_set-%s-image' % x] = SimpleUploadedFile(name='test_image.png', content=content)
+        response = self.client.post(reverse('portfolio:add_project', kwargs={'username': self.portfoller.username}), data=data)
+        self.assertEqual(response.status_code, 302)
+        images = ProjectImages.objects.filter(project__user=self.portfoller, project__project_name='test_project')
+        self.assertEqual(len(images), 3)
+        #The same content is stored once.
+        self.assertEqual(len(set(image.image.name for image in images)), 1)
+        self.assertEqual(Blob.objects.get(name=images[0].image.name).refcount, 3)
+
+    def test_invalid_image_rejected(self):
+        """
+        A file that isn't an image is rejected while uploaded and the project isn't created.
+        """
+        response = self.client.post('/signin/', {'username': 'Test', 'password': 'testpassword'})
+        response = self.client.post(reverse('portfolio:add_project', kwargs={'username': self.portfoller.username}), data={
+            'project_name': 'test_project', 'project_description': 'This is a test project.', 'projectimages_set-TOTAL_FORMS': 1,
+            'projectimages_set-INITIAL_FORMS': 0, 'projectimages_set-MIN_NUM_FORMS': 0, 'projectimages_set-MAX_NUM_FORMS': 30,
+            'projectimages_set-0-image': SimpleUploadedFile(name='test_image.png', content=b'not an image')})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Upload a valid image.')
+        self.assertEqual(Project.objects.filter(user=self.portfoller).count(), 0)
+
+    @override_settings(MAX_UPLOAD_REQUEST_SIZE=100)
+    def test_request_too_large(self):
+        """
+        Uploads bigger than `MAX_UPLOAD_REQUEST_SIZE` are rejected with a 413 error.
+        """
+        response = self.client.post('/signin/', {'username': 'Test', 'password': 'testpassword'})
+        with open(os.getcwd() + '/portfoling/media/test_media/test_image.png', 'rb') as image:
+            response = self.client.post(reverse('portfolio:add_project', kwargs={'username': self.portfoller.username}), data={
+                'project_name': 'test_project', 'projectimages_set-TOTAL_FORMS': 1, 'projectimages_set-INITIAL_FORMS': 0,
+                'projectimages_set-0-image': image})
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(Project.objects.filter(user=self.portfoller).count(), 0)
+
 class EditProjectViewTests(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -440,6 +1396,85 @@ class SignInViewTests(TestCase):
         except KeyError:
             self.assertRaises(KeyError)
 
+@override_settings(LOGIN_ATTEMPTS_LIMIT=2)
+class LoginThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfoller = create_portfoller('Test')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_sign_in_throttled(self):
+        """
+        After too many failed attempts, the sign in is refused without checking the password.
+        """
+        for attempt in range(2):
+            self.client.post('/signin/', data={'username': 'Test', 'password': 'testwrongpassword'})
+        with mock.patch('portfolio.throttling.authenticate') as authenticate:
+            response = self.client.post('/signin/', data={'username': 'Test', 'password': 'testpassword'})
+        self.assertEqual(response.status_code, 429)
+        authenticate.assert_not_called()
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    def test_api_login_throttled(self):
+        """
+        The API login answers 429 after too many failed attempts.
+        """
+        url = reverse('portfolio:api-login')
+        for attempt in range(2):
+            self.assertEqual(self.client.post(url, {'username': 'Test', 'password': 'testwrongpassword'}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'username': 'Test', 'password': 'testpassword'}).status_code, 429)
+
+    def test_concurrent_attempts_counted(self):
+        """
+        The attempts are counted before the password is checked, concurrent ones can't all pass the limit.
+        """
+        request = RequestFactory().post('/signin/')
+        checked = []
+
+        def slow_authenticate(request, username, password):
+            #Another attempt arrives while this password is hashed.
+            checked.append(username)
+            try:
+                authenticate_throttled(request, username, password)
+            except LoginThrottled:
+                pass
+            return None
+
+        with mock.patch('portfolio.throttling.authenticate', slow_authenticate):
+            authenticate_throttled(request, 'Test', 'testwrongpassword')
+        self.assertEqual(len(checked), 2)
+
+    def test_other_ip_not_throttled(self):
+        """
+        The failed attempts on a username from an IP don't lock out its owner elsewhere.
+        """
+        for attempt in range(3):
+            self.client.post('/signin/', data={'username': 'Test', 'password': 'testwrongpassword'}, REMOTE_ADDR='10.0.0.1')
+        response = self.client.post('/signin/', data={'username': 'Test', 'password': 'testpassword'}, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 302)
+
+    def test_success_resets_attempts(self):
+        """
+        A successful login forgets the failed attempts of the username.
+        """
+        self.client.post('/signin/', data={'username': 'Test', 'password': 'testwrongpassword'})
+        self.client.post('/signin/', data={'username': 'Test', 'password': 'testpassword'})
+        self.client.logout()
+        self.client.post('/signin/', data={'username': 'Test', 'password': 'testwrongpassword'})
+        response = self.client.post('/signin/', data={'username': 'Test', 'password': 'testpassword'})
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(PASSWORD_ITERATIONS=1000)
+    def test_password_rehashed(self):
+        """
+        A password hashed with other parameters is rehashed with the current ones on login.
+        """
+        self.client.post('/signin/', data={'username': 'Test', 'password': 'testpassword'})
+        password = Portfoller.objects.get(username='Test').password
+        self.assertTrue(password.startswith('pbkdf2_sha256$1000$'))
+
 class SignOutViewTests(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -465,6 +1500,9 @@ class PortfollerViewsetTests(APITestCase):
     def setUpTestData(cls):
         cls.portfoller1 = create_portfoller('test1')
         cls.portfoller2 = create_portfoller('test2')
+
+    def setUp(self):
+        cache.clear()
     
     def test_list_portfollers(self):
         """
@@ -473,6 +1511,79 @@ class PortfollerViewsetTests(APITestCase):
         response = self.client.get('/api/portfollers/')
         self.assertEqual(response.data['count'], 2)
 
+    def test_search_portfollers(self):
+        """
+        The `search` parameter filters the list by name, best match first.
+        """
+        create_portfoller('mary')
+        response = self.client.get('/api/portfollers/?search=test2')
+        self.assertEqual([item['username'] for item in response.data['results']], ['test2', 'test1'])
+
+    def test_list_portfollers_pages(self):
+        """
+        The list function pages through all portfollers with cursor links.
+        """
+        for x in range(20):
+            create_portfoller('page' + str(x))
+        response = self.client.get('/api/portfollers/')
+        usernames = [item['username'] for item in response.data['results']]
+        self.assertIsNone(response.data['previous'])
+        response = self.client.get(response.data['next'])
+        usernames += [item['username'] for item in response.data['results']]
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(len(usernames), 22)
+        self.assertEqual(len(set(usernames)), 22)
+        response = self.client.get(response.data['previous'] + '&count=false')
+        self.assertIsNone(response.data['count'])
+        self.assertEqual([item['username'] for item in response.data['results']], usernames[:15])
+        response = self.client.get('/api/portfollers/?search=page')
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_list_portfollers_not_modified(self):
+        """
+        The portfollers list is versioned by the page served, without aggregating the whole table.
+        """
+        url = '/api/portfollers/'
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn('MAX(', ' '.join(query['sql'] for query in queries))
+        Portfoller.objects.get(pk=self.portfoller2.pk).save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        #Past the cached ids of the page, a new portfoller changes the page too.
+        cache.clear()
+        create_portfoller('test3')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_list_portfollers_queries(self):
+        """
+        The number of queries of the list function doesn't depend on the number of portfollers and projects.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/portfollers/')
+        for x in range(10):
+            portfoller = create_portfoller('queries' + str(x))
+            create_project(portfoller, 'project1', 'test description')
+            create_project(portfoller, 'project2', 'test description')
+        cache.clear()
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get('/api/portfollers/')
+        self.assertCountEqual(response.data['results'][0]['projects'], ['project1', 'project2'])
+
+    def test_login_queries(self):
+        """
+        The login response loads the portfoller projects in one query.
+        """
+        create_project(self.portfoller1, 'project1', 'test description')
+        create_project(self.portfoller1, 'project2', 'test description')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/login/', {'username': 'test1', 'password': 'testpassword'})
+        self.assertCountEqual(response.data['projects'], ['project1', 'project2'])
+        self.assertEqual(len([query for query in queries if 'portfolio_project' in query['sql']]), 1)
+
     def test_create_portfoller(self):
         """
         The create function creates a new portfoller with the passed data.
@@ -556,6 +1667,31 @@ class ProjectViewsetTests(APITestCase):
         response = self.client.get('/api/portfollers/test1/projects/')
         self.assertEqual(response.data['count'], 2)
 
+    def test_list_projects_not_modified(self):
+        """
+        The projects list isn't sent again while the portfoller projects don't change.
+        """
+        url = '/api/portfollers/test1/projects/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        create_project(self.portfoller1, 'project3', 'test description')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_retrieve_project_not_modified(self):
+        """
+        A project isn't sent again until it changes, by `ETag` or `Last-Modified`.
+        """
+        url = '/api/portfollers/test1/projects/project1/'
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        Project.objects.get(pk=self.project1.pk).save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
     def test_create_project_owner(self):
         """
         The create function creates a new portfoller project with the passed data if the user is logged in the owner profile.
@@ -579,6 +1715,71 @@ class ProjectViewsetTests(APITestCase):
         self.assertEqual(response.status_code, 403)
         self.assertEqual(Project.objects.filter(user=self.portfoller1).count(), 2)
     
+    def test_bulk_create_projects(self):
+        """
+        The bulk function creates a list of projects with a constant number of queries.
+        """
+        response = self.client.post('/api/login/', {'username': 'test1', 'password': 'testpassword'})
+        data = [{'project_name': 'bulk' + str(x), 'project_description': 'test description'} for x in range(100)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/portfollers/test1/projects-bulk/', data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), data)
+        self.assertEqual(Project.objects.filter(user=self.portfoller1).count(), 102)
+        self.assertLess(len(queries), 10)
+
+    def test_bulk_create_projects_invalid(self):
+        """
+        The bulk function creates nothing if a project is invalid, and returns the errors by item.
+        """
+        response = self.client.post('/api/login/', {'username': 'test1', 'password': 'testpassword'})
+        data = [{'project_name': 'project3'}, {'project_name': 'project1'}, {'project_name': 'project3'}]
+        response = self.client.post('/api/portfollers/test1/projects-bulk/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [{}, {'project_name': ['Project name must be unique']}, {'project_name': ['Project name must be unique']}])
+        response = self.client.post('/api/portfollers/test1/projects-bulk/', [{'project_name': 'project/3'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Project.objects.filter(user=self.portfoller1).count(), 2)
+
+    def test_bulk_update_projects(self):
+        """
+        The bulk function updates the descriptions of the projects found by name.
+        """
+        response = self.client.post('/api/login/', {'username': 'test1', 'password': 'testpassword'})
+        data = [{'project_name': 'project2', 'project_description': 'new description'}, {'project_name': 'project1'}]
+        response = self.client.patch('/api/portfollers/test1/projects-bulk/', data, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0], data[0])
+        self.assertEqual(Project.objects.get(pk=self.project2.pk).project_description, 'new description')
+        self.assertEqual(Project.objects.get(pk=self.project1.pk).project_description, 'test description')
+        response = self.client.patch('/api/portfollers/test1/projects-bulk/', [{'project_name': 'project3'}], format='json')
+        self.assertEqual(response.json(), [{'project_name': ['Project not found.']}])
+
+    def test_project_named_bulk(self):
+        """
+        A project named like the bulk endpoint is reached at its own URL.
+        """
+        create_project(self.portfoller1, 'bulk', 'test description')
+        response = self.client.post('/api/login/', {'username': 'test1', 'password': 'testpassword'})
+        response = self.client.get('/api/portfollers/test1/projects/bulk/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['project_name'], 'bulk')
+        response = self.client.delete('/api/portfollers/test1/projects/bulk/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Project.objects.filter(project_name='bulk').exists())
+
+    def test_bulk_delete_projects(self):
+        """
+        The bulk function deletes the projects found by name, only for the owner.
+        """
+        response = self.client.post('/api/login/', {'username': 'test2', 'password': 'testpassword'})
+        response = self.client.delete('/api/portfollers/test1/projects-bulk/', [{'project_name': 'project1'}], format='json')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post('/api/login/', {'username': 'test1', 'password': 'testpassword'})
+        response = self.client.delete('/api/portfollers/test1/projects-bulk/', [{'project_name': 'project1'}, {'project_name': 'project2'}], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Project.objects.filter(user=self.portfoller1).count(), 0)
+
     def test_retrieve_project(self):
         """
         The retrieve function returns the correct project with the correct data.
@@ -688,6 +1889,52 @@ class ProjectImageViewset(APITestCase):
         response = self.client.post('/api/portfollers/test1/projects/project1/images/', data)
         self.assertEqual(ProjectImages.objects.filter(project=self.project1).count(), 3)
 
+    @mock.patch('portfolio.uploadhandlers.MAX_FILE_SIZE', 100)
+    def test_create_image_too_large(self):
+        """
+        The create function rejects images bigger than the maximum file size while they are uploaded.
+        """
+        response = self.client.post('/api/login/', {'username': 'test1', 'password': 'testpassword'})
+        with open(os.getcwd() + '/portfoling/media/test_media/test_image.png', 'rb') as f:
+            image = SimpleUploadedFile(name='test_image.png', content=f.read())
+        response = self.client.post('/api/portfollers/test1/projects/project1/images/', {'image': image})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['image'], ['The maximum file size that can be uploaded is 5MB'])
+        self.assertEqual(ProjectImages.objects.filter(project=self.project1).count(), 2)
+
+    def test_batch_create_images(self):
+        """
+        The batch function adds many images in one request and returns the status of each file,
+        in the upload order.
+        """
+        response = self.client.post('/api/login/', {'username': 'test1', 'password': 'testpassword'})
+        with open(os.getcwd() + '/portfoling/media/test_media/test_image.png', 'rb') as f:
+            content = f.read()
+        images = [SimpleUploadedFile(name='test_image%s.png' % x, content=content) for x in range(5)]
+        images.insert(2, SimpleUploadedFile(name='corrupted.png', content=content[:40]))
+        images.insert(0, SimpleUploadedFile(name='text.txt', content=b'not an image'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/portfollers/test1/projects/project1/images/batch/', {'images': images})
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result['name'] for result in response.data], [image.name for image in images])
+        self.assertEqual([result['status'] for result in response.data], ['invalid', 'created', 'created', 'invalid'] + ['created'] * 3)
+        self.assertEqual(ProjectImages.objects.filter(project=self.project1).count(), 7)
+        for result in response.data:
+            if result['status'] == 'created':
+                self.assertTrue(default_storage.exists(ProjectImages.objects.get(pk=result['image']['pk']).image.name))
+        self.assertLess(len(queries), 12)
+
+    def test_batch_create_images_not_owner(self):
+        """
+        The batch function doesn't add images if the user isn't logged in the owner profile.
+        """
+        response = self.client.post('/api/login/', {'username': 'test2', 'password': 'testpassword'})
+        with open(os.getcwd() + '/portfoling/media/test_media/test_image.png', 'rb') as f:
+            image = SimpleUploadedFile(name='test_image.png', content=f.read())
+        response = self.client.post('/api/portfollers/test1/projects/project1/images/batch/', {'images': [image]})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(ProjectImages.objects.filter(project=self.project1).count(), 2)
+
     def test_create_image_not_owner(self):
         """
         The create function doesn't create a new project image if the user isn't logged in the owner profile.
@@ -708,6 +1955,34 @@ class ProjectImageViewset(APITestCase):
         response = self.client.get('/api/portfollers/test1/projects/project1/images/' + str(self.image1.id) + '/')
         self.assertEqual(response.status_code, 200)
 
+    def test_image_variants(self):
+        """
+        The resized variants of an image are generated and listed by the retrieve function.
+        """
+        update_variants('portfolio.ProjectImages', self.image1.pk, 'image')
+        image = ProjectImages.objects.get(pk=self.image1.pk)
+        self.assertEqual(image.image_variants['source'], image.image.name)
+        self.assertCountEqual(image.image_variants['sizes'], IMAGE_VARIANT_WIDTHS)
+        for size in image.image_variants['sizes'].values():
+            self.assertTrue(default_storage.exists(size['webp']))
+            self.assertTrue(default_storage.exists(size['jpg']))
+        response = self.client.get('/api/portfollers/test1/projects/project1/images/' + str(self.image1.id) + '/')
+        self.assertEqual(response.data['variants']['small']['width'], 200)
+        self.assertTrue(response.data['variants']['small']['webp'].startswith('http://testserver/media/'))
+        response = self.client.get(reverse('portfolio:project', kwargs={'username': 'test1', 'project_name': 'project1'}))
+        self.assertContains(response, 'srcset="' + image.image_variants['sizes']['small']['webp'].join([settings.MEDIA_URL, ' 200w']))
+
+    def test_image_updates_project(self):
+        """
+        Adding or removing an image updates the project modification time.
+        """
+        url = '/api/portfollers/test1/projects/project1/images/'
+        etag = self.client.get(url)['ETag']
+        updated_at = Project.objects.get(pk=self.project1.pk).updated_at
+        ProjectImages.objects.get(pk=self.image1.pk).delete()
+        self.assertGreater(Project.objects.get(pk=self.project1.pk).updated_at, updated_at)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
     def test_remove_image_owner(self):
         """
         The remove function excludes the project image if the user is logged in the owner profile.
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import *
+from .facets import rebuild_facets
+
+
+#Seeded data volumes, big enough for a query per row to show up in the budgets.
+PORTFOLLERS = 500
+PROJECTS_PER_PORTFOLLER = 4
+GALLERY_PROJECTS = 30
+GALLERY_IMAGES = 30
+#Timed requests by endpoint, after the warm up ones.
+RUNS = int(os.environ.get('PERFORMANCE_RUNS', default=20))
+WARMUP_RUNS = 2
+#File with the latency percentiles of the last accepted run, created by the first run.
+BASELINE_FILE = os.environ.get('PERFORMANCE_BASELINE', os.path.join(settings.BASE_DIR, 'performance_baseline.json'))
+#Set to record the current latencies as the new baseline instead of checking them.
+UPDATE_BASELINE = bool(int(os.environ.get('PERFORMANCE_UPDATE_BASELINE', default=0)))
+#A percentile regresses when it's over the baseline one times this factor, plus the slack in milliseconds.
+TOLERANCE = float(os.environ.get('PERFORMANCE_TOLERANCE', default=1.5))
+SLACK = 5
+
+def percentile(timings, percent):
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(round(percent / 100 * (len(timings) - 1))))]
+
+def load_baseline():
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE) as f:
+        return json.load(f)
+
+@tag('performance')
+class PerformanceTests(TestCase):
+    """
+    Query budgets and latency percentiles of the pages and API endpoints, over a seeded
+    database. Run it with `python manage.py test --tag performance`.
+
+    Every request is measured without cached pages, facets or ETags, the cost of a cache
+    miss. The latencies are checked against `BASELINE_FILE`, the endpoints missing from
+    it are added.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        password = make_password('testpassword')
+        portfollers = [Portfoller(username='perf%s' % x, password=password, first_name='First%s' % x, last_name='Last%s' % x,
+            fullname=build_fullname('First%s' % x, 'Last%s' % x), email='perf%s@testmail.com' % x, birthdate='2000-01-01',
+            country_of_birth=('BR', 'US', 'PT', 'FR')[x % 4], career=('Developer', 'Designer')[x % 2], biography='Biography')
+            for x in range(PORTFOLLERS)]
+        portfollers.append(Portfoller(username='gallery', password=password, first_name='Gallery', last_name='Owner',
+            fullname=build_fullname('Gallery', 'Owner'), email='gallery@testmail.com', birthdate='2000-01-01', country_of_birth='BR'))
+        portfollers = Portfoller.objects.bulk_create(portfollers)
+        cls.owner = portfollers[-1]
+        projects = [Project(user=portfoller, project_name='project%s' % x, project_description='Description')
+            for portfoller in portfollers[:-1] for x in range(PROJECTS_PER_PORTFOLLER)]
+        projects += [Project(user=cls.owner, project_name='gallery%s' % x, project_description='Description') for x in range(GALLERY_PROJECTS)]
+        projects = Project.objects.bulk_create(projects)
+        cls.gallery = projects[-1]
+        ProjectImages.objects.bulk_create([ProjectImages(project=project, image='test_media/test_image.png')
+            for project in projects[-GALLERY_PROJECTS:] for x in range(GALLERY_IMAGES)])
+        cls.image = ProjectImages.objects.filter(project=cls.gallery).first()
+        rebuild_facets()
+        cls.timings = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        baseline = load_baseline()
+        updated = dict(baseline)
+        for name, timings in cls.timings.items():
+            if UPDATE_BASELINE or name not in baseline:
+                updated[name] = timings
+        if updated != baseline:
+            with open(BASELINE_FILE, 'w') as f:
+                json.dump(updated, f, indent=4, sort_keys=True)
+
+    def measure(self, name, url, budget, status_code=200, **extra):
+        """
+        Requests `url` and checks it doesn't run more than `budget` queries, then times it
+        and checks the latency percentiles against the baseline.
+        """
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, **extra)
+        self.assertEqual(response.status_code, status_code)
+        self.assertLessEqual(len(queries), budget, '%s ran %s queries:\n%s' % (name, len(queries), '\n'.join(query['sql'] for query in queries)))
+        timings = []
+        for run in range(WARMUP_RUNS + RUNS):
+            cache.clear()
+            start = time.perf_counter()
+            self.client.get(url, **extra)
+            if run >= WARMUP_RUNS:
+                timings.append((time.perf_counter() - start) * 1000)
+        result = {'p50': round(percentile(timings, 50), 2), 'p95': round(percentile(timings, 95), 2)}
+        self.timings[name] = result
+        expected = load_baseline().get(name)
+        if expected and not UPDATE_BASELINE:
+            for key in ('p50', 'p95'):
+                self.assertLessEqual(result[key], expected[key] * TOLERANCE + SLACK,
+                    '%s %s latency regressed: %sms, baseline %sms' % (name, key, result[key], expected[key]))
+
+    #Pages
+    def test_home(self):
+        self.measure('home', reverse('portfolio:home'), 4)
+
+    def test_home_filtered(self):
+        self.measure('home_filtered', reverse('portfolio:home') + '?filter=first1&filter_career=Developer&filter_country=BR', 4)
+
+    def test_profile(self):
+        self.measure('profile', reverse('portfolio:profile', kwargs={'username': 'gallery'}), 2)
+
+    def test_profile_owner(self):
+        self.client.login(username='gallery', password='testpassword')
+        self.measure('profile_owner', reverse('portfolio:profile', kwargs={'username': 'gallery'}), 4)
+
+    def test_project(self):
+        self.measure('project', reverse('portfolio:project', kwargs={'username': 'gallery', 'project_name': self.gallery.project_name}), 2)
+
+    #API
+    def test_api_portfollers(self):
+        self.measure('api_portfollers', '/api/portfollers/', 5)
+
+    def test_api_portfollers_search(self):
+        self.measure('api_portfollers_search', '/api/portfollers/?search=first12', 5)
+
+    def test_api_portfoller(self):
+        self.measure('api_portfoller', '/api/portfollers/gallery/', 2)
+
+    def test_api_projects(self):
+        self.measure('api_projects', '/api/portfollers/gallery/projects/', 4)
+
+    def test_api_project(self):
+        self.measure('api_project', '/api/portfollers/gallery/projects/%s/' % self.gallery.project_name, 1)
+
+    def test_api_images(self):
+        self.measure('api_images', '/api/portfollers/gallery/projects/%s/images/' % self.gallery.project_name, 4)
+
+    def test_api_image(self):
+        self.measure('api_image', '/api/portfollers/gallery/projects/%s/images/%s/' % (self.gallery.project_name, self.image.pk), 2)
+
+    def test_api_facets(self):
+        self.measure('api_facets', '/api/facets/', 1)
+
+    #Cache hits
+    def test_cached_project(self):
+        """
+        A cached page doesn't query the database.
+        """
+        url = reverse('portfolio:project', kwargs={'username': 'gallery', 'project_name': self.gallery.project_name})
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_not_modified_images(self):
+        """
+        An unchanged images list is answered with the project query only.
+        """
+        url = '/api/portfollers/gallery/projects/%s/images/' % self.gallery.project_name
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
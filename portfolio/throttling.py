@@ -0,0 +1,61 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import authenticate
+
+from .counters import increment
+
+
+LOGIN_ATTEMPTS_PREFIX = 'portfolio:loginattempts'
+
+class LoginThrottled(Exception):
+    """
+    Raised by `authenticate_throttled` when there were too many failed logins, `wait` is the
+    number of seconds until they are allowed again.
+    """
+    def __init__(self, wait):
+        super().__init__('Too many failed login attempts.')
+        self.wait = wait
+
+def get_client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+def get_attempts_keys(request, username):
+    """
+    Returns the cache keys counting the failed logins of `username` from the client IP, and
+    of the client IP, with the limit of each one.
+
+    The username is only counted with the IP, failed logins from elsewhere can't lock its
+    owner out.
+    """
+    ip = get_client_ip(request) if request is not None else ''
+    keys = [('user', '%s@%s' % ((username or '').lower(), ip), settings.LOGIN_ATTEMPTS_LIMIT)]
+    if request is not None:
+        keys.append(('ip', ip, settings.LOGIN_IP_ATTEMPTS_LIMIT))
+    return [('%s:%s:%s' % (LOGIN_ATTEMPTS_PREFIX, scope, hashlib.md5(value.encode()).hexdigest()), limit)
+        for scope, value, limit in keys]
+
+def authenticate_throttled(request, username, password):
+    """
+    Authenticates like `authenticate`, unless the username from the client IP, or the client
+    IP, tried to log in too many times in the last `settings.LOGIN_ATTEMPTS_WINDOW` seconds:
+    `LoginThrottled` is raised then, before the password is hashed. A successful login isn't
+    counted, and resets the username count.
+    """
+    keys = get_attempts_keys(request, username)
+    #Counted before the password is checked, by atomic increments, so concurrent attempts each
+    #see the ones before them.
+    attempts = [increment(key, settings.LOGIN_ATTEMPTS_WINDOW) for key, limit in keys]
+    if any(count > limit for count, (key, limit) in zip(attempts, keys)):
+        raise LoginThrottled(settings.LOGIN_ATTEMPTS_WINDOW)
+    user = authenticate(request, username=username, password=password)
+    if user is not None:
+        cache.delete(keys[0][0])
+        for key, limit in keys[1:]:
+            try:
+                cache.decr(key)
+            except ValueError:
+                #Expired meanwhile.
+                pass
+    return user
@@ -0,0 +1,176 @@
+from functools import wraps
+
+from rest_framework import exceptions, serializers
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopUpload
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+from .validators import MAX_FILE_SIZE, FILE_TOO_LARGE_MESSAGE
+
+
+#Magic numbers of the accepted image formats.
+IMAGE_SIGNATURES = (
+    b'\x89PNG\r\n\x1a\n',
+    b'\xff\xd8\xff',
+    b'GIF87a',
+    b'GIF89a',
+    b'BM',
+    b'II*\x00',
+    b'MM\x00*',
+)
+INVALID_IMAGE_MESSAGE = 'Upload a valid image. The file you uploaded was either not an image or a corrupted image.'
+REQUEST_TOO_LARGE_MESSAGE = 'The uploaded files are too large.'
+
+def is_image_header(header):
+    """
+    Returns if the first bytes of a file are the ones of an accepted image format.
+    """
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return True
+    return header.startswith(IMAGE_SIGNATURES)
+
+class ImageUploadHandler(FileUploadHandler):
+    """
+    Upload handler checking the uploaded images while they are streamed, before the next
+    handlers write them to memory or disk.
+
+    Files bigger than `MAX_FILE_SIZE` or that don't start like an image are dropped, with
+    an error in `request.upload_errors` by field name, and in `request.rejected_files` as
+    `(field_name, file_name, message, index)`, `index` being the position of the file among
+    the ones sent in its field. The whole upload stops once the request goes over
+    `settings.MAX_UPLOAD_REQUEST_SIZE`.
+    """
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.request_size = 0
+        self.request_too_large = False
+        self.field_files = {}
+        request.upload_errors = {}
+        request.rejected_files = []
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file_size = 0
+        self.file_index = self.field_files.get(self.field_name, 0)
+        self.field_files[self.field_name] = self.file_index + 1
+
+    def reject(self, message):
+        self.request.upload_errors[self.field_name] = message
+        self.request.rejected_files.append((self.field_name, self.file_name, message, self.file_index))
+        raise SkipFile()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.request_size += len(raw_data)
+        if self.request_size > settings.MAX_UPLOAD_REQUEST_SIZE:
+            self.request_too_large = True
+            raise StopUpload(connection_reset=True)
+        if self.file_size == 0 and not is_image_header(raw_data[:12]):
+            self.reject(INVALID_IMAGE_MESSAGE)
+        self.file_size += len(raw_data)
+        if self.file_size > MAX_FILE_SIZE:
+            self.reject(FILE_TOO_LARGE_MESSAGE)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+def get_content_length(request):
+    try:
+        return int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return 0
+
+def install_image_upload_handler(request):
+    """
+    Puts an `ImageUploadHandler` in front of the upload handlers of `request` and returns it.
+    """
+    handler = ImageUploadHandler(request)
+    request.upload_handlers.insert(0, handler)
+    return handler
+
+def stream_image_uploads(view):
+    """
+    View decorator checking the uploaded images with `ImageUploadHandler`. Too large requests
+    are answered with a 413 error without being read.
+
+    The CSRF check reads the request body, so it's done after the handler is installed.
+    """
+    protected_view = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapped_view(request, *args, **kwargs):
+        if request.method == 'POST':
+            if get_content_length(request) > settings.MAX_UPLOAD_REQUEST_SIZE:
+                return HttpResponse(REQUEST_TOO_LARGE_MESSAGE, status=413)
+            handler = install_image_upload_handler(request)
+            #Parsing the body streams the files through the handler.
+            if not hasattr(request, '_post'):
+                request._load_post_and_files()
+            if handler.request_too_large:
+                return HttpResponse(REQUEST_TOO_LARGE_MESSAGE, status=413)
+        return protected_view(request, *args, **kwargs)
+    return wrapped_view
+
+def add_upload_errors(request, *forms):
+    """
+    Adds the errors of the files rejected by `ImageUploadHandler` to the `forms` (or formsets)
+    with these fields, returns if there was any error.
+    """
+    errors = getattr(request, 'upload_errors', {})
+    found = False
+    for form in forms:
+        for form in getattr(form, 'forms', [form]):
+            for name in form.fields:
+                if form.add_prefix(name) in errors:
+                    #`add_error` needs the form cleaned first.
+                    form.is_valid()
+                    form.add_error(name, errors[form.add_prefix(name)])
+                    found = True
+    return found
+
+class ImageUploadFormMixin:
+    """
+    Class based view mixin applying `stream_image_uploads`, the rejected files errors are
+    added to the form returned by `get_form`.
+    """
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return stream_image_uploads(super().as_view(**initkwargs))
+
+    def get_form(self, *args, **kwargs):
+        form = super().get_form(*args, **kwargs)
+        add_upload_errors(self.request, form)
+        return form
+
+class RequestTooLarge(exceptions.APIException):
+    status_code = 413
+    default_detail = REQUEST_TOO_LARGE_MESSAGE
+    default_code = 'request_too_large'
+
+class ImageUploadAPIMixin:
+    """
+    API view mixin checking the uploaded images with `ImageUploadHandler`, rejected files are
+    reported as validation errors.
+    """
+    def initialize_request(self, request, *args, **kwargs):
+        if request.method in ('POST', 'PUT', 'PATCH'):
+            self.upload_handler = install_image_upload_handler(request)
+        return super().initialize_request(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        if get_content_length(request) > settings.MAX_UPLOAD_REQUEST_SIZE:
+            raise RequestTooLarge()
+        super().initial(request, *args, **kwargs)
+        if request.method in ('POST', 'PUT', 'PATCH'):
+            #Parsing the body streams the files through the handler, before the view runs.
+            request._load_data_and_files()
+            if self.upload_handler.request_too_large:
+                raise RequestTooLarge()
+            self.check_upload_errors(request._request.upload_errors)
+
+    def check_upload_errors(self, errors):
+        if errors:
+            raise serializers.ValidationError({field: [message] for field, message in errors.items()})
@@ -1,8 +1,8 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings 
-from django.conf.urls.static import static 
 from rest_framework.routers import DefaultRouter
 from . import views, models
+from .media import MediaView
 
 app_name = 'portfolio'
 
@@ -36,9 +36,17 @@ urlpatterns = [
     path('signin/', views.signin, name='signin'),
     path('signout/', views.signout, name='signout'),
     path('api/', include(router.urls)),
+    #Next to `projects/`, not in it, where it would hide a project with the same name.
+    re_path(r'^api/portfollers/(?P<username>\w+)/projects-bulk/$',
+        views.ProjectViewSet.as_view({'post': 'bulk', 'patch': 'bulk', 'delete': 'bulk'}), name='projects-bulk'),
     path('api/login/', views.LoginView.as_view(), name='api-login'),
     path('api/logout/', views.LogoutView.as_view(), name='api-logout'),
+    path('api/facets/', views.FacetsView.as_view(), name='api-facets'),
+    path('api/metrics/db-pool/', views.DatabasePoolView.as_view(), name='api-db-pool'),
+    path('api/metrics/tasks/', views.TaskQueueView.as_view(), name='api-tasks'),
 ]
 
-if settings.DEBUG: 
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT) 
\ No newline at end of file
+#Uploaded files, served in production too.
+urlpatterns += [
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), MediaView.as_view(), name='media'),
+]
\ No newline at end of file
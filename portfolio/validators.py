@@ -3,14 +3,18 @@ from dateutil.relativedelta import relativedelta
 from django.utils import timezone, dateformat
 
 
+#Maximum size of the uploaded files, in bytes.
+MAX_FILE_SIZE = 5242880
+FILE_TOO_LARGE_MESSAGE = "The maximum file size that can be uploaded is 5MB"
+
 def validate_file_size(file):
     """
     Validate that the file size is less than 5 MB.
     """
     filesize = file.size
     
-    if filesize > 5242880:
-        raise ValidationError("The maximum file size that can be uploaded is 5MB")
+    if filesize > MAX_FILE_SIZE:
+        raise ValidationError(FILE_TOO_LARGE_MESSAGE)
     else:
         return file
 
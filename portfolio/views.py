@@ -1,3 +1,4 @@
+import os
 import re
 
 from rest_framework import viewsets, mixins, status, views, response
@@ -6,28 +7,42 @@ from rest_framework.response import Response
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.permissions import AllowAny
 
+from django.conf import settings
 from django.http import HttpResponseRedirect
 from django.shortcuts import render, redirect, reverse, get_object_or_404
 from django.views import generic, View
 from django.db import IntegrityError, transaction
-from django.db.models.functions import Concat
-from django.db.models import Value, Count
 from django.core.exceptions import ValidationError, PermissionDenied
 from django.contrib import messages
-from django.contrib.auth import login, authenticate, logout
+from django.contrib.auth import login, logout
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.utils import timezone
 
 from .models import *
 from .forms import *
 from .choices import *
 from .serializers import *
 from .permissions import *
+from .search import PORTFOLLER_ORDERINGS, filter_portfollers
+from .facets import get_facets
+from .throttling import authenticate_throttled, LoginThrottled
+from .db.pool import get_pools_stats
+from .tasks import get_queue_stats, get_worker_stats
+from .pagination import KeysetPaginationMixin, CachedKeysetPagination
+from .prefetch import SerializerPrefetchMixin, prefetch_instances_for_serializer
+from .resolvers import NestedObjectsMixin
+from .pagecache import PageCacheMixin, projects_changed
+from .conditional import ConditionalGetMixin, get_queryset_version, touch
+from .asyncviews import AsyncReadMixin
+from .purge import delete_projects, delete_portfoller
+from .batch import validate_images, create_project_images, save_project_images_formset
+from .uploadhandlers import ImageUploadFormMixin, ImageUploadAPIMixin, stream_image_uploads, add_upload_errors
 
 
 class HomeRedirect(generic.RedirectView):
     url = 'home/'
 
-class PortfollerList(generic.ListView):
+class PortfollerList(AsyncReadMixin, KeysetPaginationMixin, generic.ListView):
     paginate_by = 15
     template_name = 'portfolio/index.html'
     model = Portfoller
@@ -37,42 +52,34 @@ class PortfollerList(generic.ListView):
         """
         Returns an filtered queryset based on the parameters passed on the GET request. 
         """
-        queryset = Portfoller.objects.annotate(fullname=Concat('first_name', Value(' '), 'last_name'))
-        filter_val = self.request.GET.get('filter', '')
-        filter_career = self.request.GET.get('filter_career', 'All')
-        filter_country = self.request.GET.get('filter_country', 'All')
-        if filter_val:
-            queryset = queryset.filter(fullname__icontains=filter_val)
-        if filter_career != 'All':
-            queryset = queryset.filter(career=filter_career)
-        if filter_country != 'All':
-            queryset = queryset.filter(country_of_birth=filter_country)
-        return queryset.order_by('fullname')
+        return filter_portfollers(Portfoller.objects.order_by('fullname', 'id'), self.request.GET.get('filter', ''),
+            self.request.GET.get('filter_career', 'All'), self.request.GET.get('filter_country', 'All'))
 
     def get_context_data(self, **kwargs):
         context = super(PortfollerList, self).get_context_data(**kwargs)
-        context['countries'] = Portfoller.objects.distinct('country_of_birth')
+        facets = get_facets()
+        context['countries'] = facets['country_of_birth']
+        context['careers'] = facets['career']
         context['filter'] = self.request.GET.get('filter', '')
         context['filter_career'] = self.request.GET.get('filter_career', 'All')
         context['filter_country'] = self.request.GET.get('filter_country', 'All')
-        context['career_options'] = CAREER_OPTIONS
         return context
 
-class ProfileView(generic.DetailView):
+class ProfileView(AsyncReadMixin, PageCacheMixin, NestedObjectsMixin, generic.DetailView):
     model = Portfoller
-    template_name = 'portfolio\profile.html'    
+    cached_page = 'profile'
+    template_name = 'portfolio/profile.html'
 
     def get_context_data(self, **kwargs):
         context = super(ProfileView, self).get_context_data(**kwargs)
-        self.portfoller = get_object_or_404(Portfoller, username=self.kwargs['username'])
-        context['project_list'] = Project.objects.filter(user=self.portfoller).order_by('project_name')
-        context['profile_owner'] = self.portfoller.profile_owner(self.request.user.username)
+        context['project_list'] = Project.objects.filter(user=self.object).order_by('project_name')
+        context['profile_owner'] = self.object.profile_owner(self.request.user.username)
         return context
 
     def get_object(self):
-        return get_object_or_404(Portfoller, username=self.kwargs['username'])
+        return self.get_portfoller()
 
-class EditProfile(LoginRequiredMixin, generic.UpdateView):
+class EditProfile(ImageUploadFormMixin, LoginRequiredMixin, NestedObjectsMixin, generic.UpdateView):
     model = Portfoller
     fields = ['first_name', 'last_name', 'gender', 'career', 'email', 'profile_picture', 'biography'] 
     template_name = 'portfolio/edit_profile.html'
@@ -87,31 +94,29 @@ class EditProfile(LoginRequiredMixin, generic.UpdateView):
         return reverse('portfolio:profile', kwargs={'username': self.request.user.username})
 
     def get_object(self, **kwargs):
-        profile_user = get_object_or_404(Portfoller, username=self.kwargs['username'])
+        profile_user = self.get_portfoller()
         if profile_user.profile_owner(self.request.user.username):
             return profile_user
         raise PermissionDenied
 
-class ProjectView(generic.DetailView):
+class ProjectView(AsyncReadMixin, PageCacheMixin, NestedObjectsMixin, generic.DetailView):
     model = Project
+    cached_page = 'project'
     template_name = 'portfolio/project.html'
     
     def get_context_data(self, **kwargs):
         context = super(ProjectView, self).get_context_data(**kwargs)
-        self.portfoller = get_object_or_404(Portfoller, username=self.kwargs['username'])
-        self.project = get_object_or_404(Project, user=self.portfoller, project_name=self.kwargs['project_name'])
-        context['images'] = ProjectImages.objects.filter(project=self.project)
+        context['images'] = ProjectImages.objects.filter(project=self.object)
         return context
 
     def get_object(self):
-        user = get_object_or_404(Portfoller, username=self.kwargs['username'])
-        return get_object_or_404(Project, project_name=self.kwargs['project_name'], user=user)
+        return self.get_project()
 
-class AddProject(LoginRequiredMixin, View):
+class AddProject(ImageUploadFormMixin, LoginRequiredMixin, NestedObjectsMixin, View):
     login_url = '/signin/'
 
     def get(self, request, username):
-        user = get_object_or_404(Portfoller, username=username)
+        user = self.get_portfoller()
         if not user.profile_owner(self.request.user.username):
             raise PermissionDenied
         project = Project(user=user)
@@ -120,55 +125,62 @@ class AddProject(LoginRequiredMixin, View):
         return render(request, 'portfolio/add_project.html', {'form': form, 'formset': formset})
     
     def post(self, request, username):
-        user = get_object_or_404(Portfoller, username=username)
+        user = self.get_portfoller()
+        if not user.profile_owner(self.request.user.username):
+            raise PermissionDenied
         project = Project(user=user)
         form = AddProjectForm(request.POST, request.FILES, instance=project)
         formset = ProjectImagesFormSet(request.POST, request.FILES, instance=project)
         form.instance.user = user
+        if add_upload_errors(request, form, formset):
+            return render(request, 'portfolio/add_project.html', {'form': form, 'formset': formset})
         if form.is_valid():
             try:
                 created_project = form.save(commit=False)
                 formset = ProjectImagesFormSet(request.POST, request.FILES, instance=created_project)
                 if formset.is_valid():
                     created_project.save()
-                    formset.save()
+                    save_project_images_formset(formset)
                     return HttpResponseRedirect(reverse('portfolio:project', kwargs={'username': username, 'project_name': created_project.project_name}))
             except IntegrityError:
                 return render(request, 'portfolio/add_project.html', {'form': form, 'formset': formset})
         else:
             return render(request, 'portfolio/add_project.html', {'form': form, 'formset': formset}) 
     
-class EditProject(LoginRequiredMixin, View):
+class EditProject(ImageUploadFormMixin, LoginRequiredMixin, NestedObjectsMixin, View):
     login_url = '/signin/'
 
     def get(self, request, username, project_name):
-        user = get_object_or_404(Portfoller, username=username)
-        if not user.profile_owner(self.request.user.username):
+        project = self.get_project()
+        if not project.user.profile_owner(self.request.user.username):
             raise PermissionDenied
-        project = Project.objects.get(user=user, project_name=project_name)
         form = EditProjectForm(instance=project)
         formset = ProjectImagesFormSet(instance=project)
         return render(request, 'portfolio/edit_project.html', {'form': form, 'formset': formset, 'project': project})
     
     def post(self, request, username, project_name):
-        project = Project.objects.get(user=request.user, project_name=project_name)
+        project = self.get_project()
+        if not project.user.profile_owner(self.request.user.username):
+            raise PermissionDenied
         form = EditProjectForm(request.POST, request.FILES, instance=project)
         formset = ProjectImagesFormSet(request.POST, request.FILES, instance=project)
         form.instance.user = request.user
+        if add_upload_errors(request, form, formset):
+            return render(request, 'portfolio/edit_project.html', {'form': form, 'formset': formset, 'project': project})
         if form.is_valid():
             try:
                 created_project = form.save(commit=False)
                 formset = ProjectImagesFormSet(request.POST, request.FILES, instance=created_project)
                 if formset.is_valid():
                     created_project.save()
-                    formset.save()
+                    save_project_images_formset(formset)
                     return HttpResponseRedirect(reverse('portfolio:project', kwargs={'username': username, 'project_name': created_project.project_name}))
             except IntegrityError:
                 return render(request, 'portfolio/edit_project.html', {'form': form, 'formset': formset, 'project': project})
         else:
             return render(request, 'portfolio/edit_project.html', {'form': form, 'formset': formset, 'project': project})
     
-class DeleteProject(LoginRequiredMixin, generic.DeleteView):
+class DeleteProject(LoginRequiredMixin, NestedObjectsMixin, generic.DeleteView):
     model = Project
     template = 'portfolio/delete_project.html'
     template_name = 'portfolio/delete_project.html'
@@ -177,42 +189,51 @@ class DeleteProject(LoginRequiredMixin, generic.DeleteView):
     login_url = '/signin/'
 
     def get_object(self):
-        profile_user = get_object_or_404(Portfoller, username=self.kwargs['username'])
-        if not profile_user.profile_owner(self.request.user.username):
+        project = self.get_project()
+        if not project.user.profile_owner(self.request.user.username):
             raise PermissionDenied
-        return get_object_or_404(Project, user=profile_user, project_name=self.kwargs['project_name'])
+        return project
 
     def get_success_url(self):
         return reverse('portfolio:profile', kwargs={'username': self.object.user.username})
-    
-    def get_context_data(self, **kwargs):
-        context = super(DeleteProject, self).get_context_data(**kwargs)
-        self.portfoller = get_object_or_404(Portfoller, username=self.kwargs['username'])
-        context['project'] = Project.objects.get(user=self.portfoller, project_name=self.kwargs['project_name'])
-        return context
 
+    def delete(self, request, *args, **kwargs):
+        """
+        Marks the project as deleted, its rows and images are removed in the background.
+        """
+        self.object = self.get_object()
+        success_url = self.get_success_url()
+        delete_projects(self.object.user, [self.object])
+        return HttpResponseRedirect(success_url)
+
+@stream_image_uploads
 def signup(request):
     if request.method == 'POST':
         form = SignUpForm(request.POST, request.FILES)
+        add_upload_errors(request, form)
         if form.is_valid():
-            form.save()
-            username = form.cleaned_data.get('username')
-            raw_password = form.cleaned_data.get('password1')
-            user = authenticate(username=username, password=raw_password)
+            #Logged in without checking the password it was just given, hashing it again.
+            user = form.save()
             login(request, user)
             return HttpResponseRedirect(request.GET.get('next', reverse('portfolio:home')))
         else:
-            return render(request, 'portfolio\signup.html', {'form': form})
+            return render(request, 'portfolio/signup.html', {'form': form})
     else:
         form = SignUpForm()
-    return render(request, 'portfolio\signup.html', {'form': form})
+    return render(request, 'portfolio/signup.html', {'form': form})
 
 def signin(request):
     if request.method == 'POST':
         form = SignInForm(request.POST)
         username = request.POST.get('username')
         password = request.POST.get('password')
-        user = authenticate(request, username=username, password=password)
+        try:
+            user = authenticate_throttled(request, username, password)
+        except LoginThrottled:
+            messages.add_message(
+                request, messages.ERROR, "Too many failed attempts, try again later"
+            )
+            return render(request, 'portfolio/signin.html', {'form': form}, status=429)
         if user is not None:
             login(request, user)
             return HttpResponseRedirect(request.GET.get('next', reverse('portfolio:home')))
@@ -220,13 +241,13 @@ def signin(request):
             messages.add_message(
                 request, messages.ERROR, "Incorrect user or password"
             )
-        return render(request, 'portfolio\signin.html', {'form': form})
+        return render(request, 'portfolio/signin.html', {'form': form})
     
     else:
         form = SignInForm()
         if request.user.is_authenticated:
             return HttpResponseRedirect(request.GET.get('next', reverse('portfolio:home')))
-        return render(request, 'portfolio\signin.html', {'form': form})
+        return render(request, 'portfolio/signin.html', {'form': form})
 
 def signout(request):
     next_url = request.GET.get('next', reverse('portfolio:home'))
@@ -246,43 +267,118 @@ class LoginView(views.APIView):
     serializer_class = LoginSerializer
 
     def post(self, request):
-        serializer = LoginSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
         login(request, user)
-        return response.Response(PortfollerSerializer(user).data)
+        serializer = PortfollerSerializer(user)
+        prefetch_instances_for_serializer([user], serializer)
+        return response.Response(serializer.data)
 
 class LogoutView(views.APIView):
     def post(self, request):
         logout(request)
         return response.Response()
 
-class PortfollerViewSet(viewsets.ModelViewSet):
+class FacetsView(views.APIView):
+    """
+    Lists the values of the portfollers filters with the number of portfollers of each one.
+    """
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request):
+        return response.Response({field: [facet._asdict() for facet in facets] for field, facets in get_facets().items()})
+
+class DatabasePoolView(views.APIView):
+    """
+    Lists the statistics of the database connection pools of the process serving the request.
+    """
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        return response.Response({'pid': os.getpid(), 'pools': get_pools_stats()})
+
+class TaskQueueView(views.APIView):
+    """
+    Lists the depth and latency of the background tasks queue, and the tasks run by the
+    process serving the request.
+    """
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        return response.Response({'pid': os.getpid(), 'queue': get_queue_stats(), 'process': get_worker_stats()})
+
+class PortfollerViewSet(AsyncReadMixin, ConditionalGetMixin, ImageUploadAPIMixin, SerializerPrefetchMixin, viewsets.ModelViewSet):
     permission_classes = [IsOwnerOrReadOnly]
     lookup_field = 'username'
+    pagination_class = CachedKeysetPagination
+    #Query parameters selecting the listed portfollers, see `CachedKeysetPagination`.
+    results_cache_params = ('search', 'career', 'country', 'ordering')
 
     def get_queryset(self):
-        queryset = Portfoller.objects.annotate(fullname=Concat('first_name', Value(' '), 'last_name'))
-        return queryset.order_by('fullname')
+        queryset = Portfoller.objects.order_by('fullname', 'id')
+        if self.action == 'list':
+            params = self.request.query_params
+            ordering = params.get('ordering') or None
+            if ordering is not None and ordering not in PORTFOLLER_ORDERINGS:
+                raise serializers.ValidationError({'ordering': ['Unknown ordering, expected one of: %s.' % ', '.join(PORTFOLLER_ORDERINGS)]})
+            queryset = filter_portfollers(queryset, params.get('search', ''),
+                params.get('career') or 'All', params.get('country') or 'All', ordering)
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'create':
             return CreatePortfollerSerializer
         return PortfollerSerializer      
 
-class ProjectViewSet(viewsets.ModelViewSet):
+    def get_page_version(self, objects):
+        version = super().get_page_version(objects)
+        if self.get_expand():
+            version += get_queryset_version(Project.objects.filter(user__in=[obj.pk for obj in objects]))
+        return version
+
+    def get_object_version(self, instance):
+        """
+        With `?expand=`, the version also follows the projects, touched when their images change.
+        """
+        version = super().get_object_version(instance)
+        if self.get_expand():
+            version += get_queryset_version(Project.objects.filter(user=instance))
+        return version
+
+    def get_expand(self):
+        return get_field_names(self.request, 'expand')
+
+    def perform_destroy(self, instance):
+        delete_portfoller(instance)
+
+class ProjectViewSet(AsyncReadMixin, ConditionalGetMixin, SerializerPrefetchMixin, NestedObjectsMixin, viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
     permission_classes =[IsOwnerOrReadOnly]
     lookup_field = 'project_name'
     
     def get_queryset(self):
-        portfoller = get_object_or_404(Portfoller, username=self.kwargs['username'])
-        return Project.objects.filter(user=portfoller).order_by('project_name')
+        return Project.objects.filter(user=self.get_portfoller()).order_by('project_name', 'id')
+
+    def get_list_version(self):
+        """
+        The portfoller is touched when its projects change, with `?expand=` the version also
+        follows the projects, touched when their images change.
+        """
+        version = self.get_object_version(self.get_portfoller())
+        if get_field_names(self.request, 'expand'):
+            version += get_queryset_version(self.get_queryset())
+        return version
+
+    def get_object(self):
+        project = self.get_project()
+        self.check_object_permissions(self.request, project)
+        return project
 
     def create(self, request, username):
         try:
             serializer = self.get_serializer(data=self.request.data)
-            portfoller = Portfoller.objects.get(username=username)
+            portfoller = self.get_portfoller()
             self.check_object_permissions(self.request, portfoller)
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_304_NOT_MODIFIED)
@@ -295,10 +391,8 @@ class ProjectViewSet(viewsets.ModelViewSet):
     
     def update(self, request, username, project_name, *args, **kwargs):
         try:
-            portfoller = get_object_or_404(Portfoller, username=username)
             instance = self.get_object()
             serializer = self.get_serializer(instance, data=request.data)
-            self.check_object_permissions(self.request, portfoller)
             serializer.is_valid(raise_exception=True)
             self.perform_update(serializer)
             headers = self.get_success_headers(serializer.data)
@@ -306,7 +400,84 @@ class ProjectViewSet(viewsets.ModelViewSet):
         except IntegrityError:
             raise serializers.ValidationError("Project name must be unique")
 
-class ProjectImageViewSet(mixins.CreateModelMixin, 
+    def perform_destroy(self, instance):
+        delete_projects(instance.user, [instance])
+
+    def bulk(self, request, username):
+        """
+        Creates (POST), updates (PATCH) or deletes (DELETE) a list of projects in one transaction,
+        the existing projects are found by `project_name`. Nothing is saved if one of them is
+        invalid, the errors are returned by item.
+        """
+        portfoller = self.get_portfoller()
+        self.check_object_permissions(request, portfoller)
+        if isinstance(request.data, list) and len(request.data) > settings.BULK_MAX_ITEMS:
+            raise serializers.ValidationError({'non_field_errors': ['Send at most %s projects.' % settings.BULK_MAX_ITEMS]})
+        if request.method == 'POST':
+            return self.bulk_create(portfoller, request.data)
+        serializer = self.get_serializer(data=request.data, many=True, partial=True)
+        serializer.is_valid(raise_exception=True)
+        projects = self.get_bulk_projects(portfoller, serializer.validated_data)
+        if request.method == 'PATCH':
+            return self.bulk_update(portfoller, projects, serializer.validated_data)
+        data = self.get_serializer(projects, many=True).data
+        delete_projects(portfoller, projects)
+        return Response(data)
+
+    def bulk_create(self, portfoller, data):
+        serializer = self.get_serializer(data=data, many=True)
+        serializer.is_valid(raise_exception=True)
+        names = [item['project_name'] for item in serializer.validated_data]
+        existing = set(Project.objects.filter(user=portfoller, project_name__in=names).values_list('project_name', flat=True))
+        errors = []
+        for index, name in enumerate(names):
+            unique = name not in existing and name not in names[:index]
+            errors.append({} if unique else {'project_name': ['Project name must be unique']})
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        try:
+            with transaction.atomic():
+                projects = Project.objects.bulk_create([Project(user=portfoller, **item) for item in serializer.validated_data])
+        except IntegrityError:
+            raise serializers.ValidationError("Project name must be unique")
+        touch(Portfoller, portfoller.pk)
+        projects_changed(portfoller.username, [])
+        return Response(self.get_serializer(projects, many=True).data, status=status.HTTP_201_CREATED)
+
+    def get_bulk_projects(self, portfoller, items):
+        """
+        Returns the projects of `portfoller` named in `items`, in the same order.
+        """
+        names = [item.get('project_name') for item in items]
+        projects = Project.objects.filter(user=portfoller, project_name__in=[name for name in names if name])
+        projects = {project.project_name: project for project in projects}
+        errors = []
+        for name in names:
+            if not name:
+                errors.append({'project_name': ['This field is required.']})
+            else:
+                errors.append({} if name in projects else {'project_name': ['Project not found.']})
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return [projects[name] for name in names]
+
+    def bulk_update(self, portfoller, projects, items):
+        now = timezone.now()
+        for project, item in zip(projects, items):
+            project.project_description = item.get('project_description', project.project_description)
+            project.updated_at = now
+        with transaction.atomic():
+            Project.objects.bulk_update(projects, ['project_description', 'updated_at'])
+        touch(Portfoller, portfoller.pk)
+        projects_changed(portfoller.username, [project.project_name for project in projects])
+        return Response(self.get_serializer(projects, many=True).data)
+
+class ProjectImageViewSet(AsyncReadMixin,
+                   ConditionalGetMixin,
+                   ImageUploadAPIMixin,
+                   SerializerPrefetchMixin,
+                   NestedObjectsMixin,
+                   mixins.CreateModelMixin, 
                    mixins.RetrieveModelMixin, 
                    mixins.DestroyModelMixin,
                    mixins.ListModelMixin,
@@ -315,18 +486,65 @@ class ProjectImageViewSet(mixins.CreateModelMixin,
     permission_classes = [IsOwnerOrReadOnly]
 
     def get_queryset(self):
-        portfoller = get_object_or_404(Portfoller, username=self.kwargs['username'])
-        project = Project.objects.get(user=portfoller, project_name = self.kwargs['project_name'])
-        return ProjectImages.objects.filter(project=project)
+        return ProjectImages.objects.filter(project=self.get_project()).order_by('id')
+
+    def get_list_version(self):
+        return self.get_object_version(self.get_project())
+
+    def get_object(self):
+        image = get_object_or_404(self.get_queryset(), pk=self.kwargs['pk'])
+        image.project = self.get_project()
+        self.check_object_permissions(self.request, image)
+        return image
 
     def create(self, validated_data, username, project_name):
         serializer = self.get_serializer(data=self.request.data)
-        portfoller = Portfoller.objects.get(username=username)
-        project = Project.objects.get(user=portfoller, project_name=project_name)
-        self.check_object_permissions(self.request, portfoller)
+        project = self.get_project()
+        self.check_object_permissions(self.request, project.user)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_304_NOT_MODIFIED)
         data = serializer.validated_data
         serializer.save(project=project)
         headers = self.get_success_headers(serializer.data)
-        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    def check_upload_errors(self, errors):
+        #The files rejected by a batch upload are reported with the other ones.
+        if self.action != 'batch':
+            super().check_upload_errors(errors)
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request, username, project_name):
+        """
+        Adds the images sent in the `images` field, the valid ones are saved even if others
+        aren't. Returns the status of each file: `created` with the image or `invalid` with
+        the errors.
+        """
+        project = self.get_project()
+        self.check_object_permissions(self.request, project.user)
+        files = request.FILES.getlist('images')
+        rejected = {index: (name, message) for field, name, message, index in request._request.rejected_files if field == 'images'}
+        if not files and not rejected:
+            raise serializers.ValidationError({'images': ['No file was submitted.']})
+        if len(files) + len(rejected) > settings.BULK_MAX_ITEMS:
+            raise serializers.ValidationError({'images': ['Send at most %s files.' % settings.BULK_MAX_ITEMS]})
+        errors = validate_images(files)
+        images = create_project_images(project, [ProjectImages(image=file) for file, file_errors in zip(files, errors) if not file_errors])
+        images = iter(images)
+        accepted = iter(zip(files, errors))
+        results = []
+        #The rejected files are put back at their position, the accepted ones are in order.
+        for index in range(len(files) + len(rejected)):
+            if index in rejected:
+                name, message = rejected[index]
+                results.append({'name': name, 'status': 'invalid', 'errors': [message]})
+                continue
+            file, file_errors = next(accepted)
+            if file_errors:
+                results.append({'name': file.name, 'status': 'invalid', 'errors': file_errors})
+            else:
+                results.append({'name': file.name, 'status': 'created', 'image': self.get_serializer(next(images)).data})
+        created = sum(result['status'] == 'created' for result in results)
+        if created == len(results):
+            return Response(results, status=status.HTTP_201_CREATED)
+        return Response(results, status=status.HTTP_207_MULTI_STATUS if created else status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
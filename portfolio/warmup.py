@@ -0,0 +1,46 @@
+import os
+import time
+
+from PIL import Image
+
+from django.apps import apps
+from django.template import engines
+from django.urls import get_resolver
+
+from django_countries import countries
+
+
+#Apps whose templates are compiled by `warm_up`.
+WARM_UP_TEMPLATE_APPS = ('portfolio', 'rest_framework')
+
+def get_template_names(app_label):
+    directory = os.path.join(apps.get_app_config(app_label).path, 'templates')
+    for root, dirs, files in os.walk(directory):
+        for filename in files:
+            if filename.endswith('.html'):
+                yield os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+
+def populate_resolver(resolver):
+    """
+    Builds the reverse lookups of `resolver` and of its namespaces, lazily built otherwise
+    at the first `reverse` of each.
+    """
+    resolver._populate()
+    for namespace, (prefix, namespace_resolver) in resolver.namespace_dict.items():
+        populate_resolver(namespace_resolver)
+
+def warm_up():
+    """
+    Loads what the first requests of a process would load otherwise: the URL resolvers,
+    the compiled templates, the countries names and the image plugins. Called before the
+    workers are forked, they all start with it. Returns the time it took, in seconds.
+    """
+    start = time.perf_counter()
+    populate_resolver(get_resolver())
+    engine = engines['django']
+    for app_label in WARM_UP_TEMPLATE_APPS:
+        for name in get_template_names(app_label):
+            engine.get_template(name)
+    list(countries)
+    Image.init()
+    return time.perf_counter() - start